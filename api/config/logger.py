@@ -1,85 +1,121 @@
-import logging.config
-
-ERROR_LOG_FILENAME = "logs/error.log"
-LOG_FILENAME = "logs/logs.log"
-JSON_LOG_FILENAME = "logs/json.log"
-
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "default": {
-            "format": "%(asctime)s::%(name)-70s::%(process)d::%(lineno)-4d:: "
-            "%(levelname)-7s :: %(message)s",
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-        },
-        "json": {  # The formatter name
-            "()": "pythonjsonlogger.jsonlogger.JsonFormatter",
-            "format": """
-                    asctime: %(asctime)s
-                    created: %(created)f
-                    filename: %(filename)s
-                    funcName: %(funcName)s
-                    levelname: %(levelname)s
-                    levelno: %(levelno)s
-                    lineno: %(lineno)d
-                    message: %(message)s
-                    module: %(module)s
-                    msec: %(msecs)d
-                    name: %(name)s
-                    pathname: %(pathname)s
-                    process: %(process)d
-                    processName: %(processName)s
-                    relativeCreated: %(relativeCreated)d
-                    thread: %(thread)d
-                    threadName: %(threadName)s
-                    exc_info: %(exc_info)s
-                """,
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-        },
-    },
-    "handlers": {
-        "logfile": {
-            "formatter": "default",
-            "level": "DEBUG",
-            "class": "logging.handlers.RotatingFileHandler",
-            "filename": LOG_FILENAME,
-            "backupCount": 2,
-        },
-        "errlogfile": {
-            "formatter": "default",
-            "level": "ERROR",
-            "class": "logging.handlers.RotatingFileHandler",
-            "filename": LOG_FILENAME,
-            "backupCount": 2,
-        },
-        "verbose_output": {
-            "formatter": "default",
-            "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "stream": "ext://sys.stdout",
-        },
-        "jsonfile": {
-            "formatter": "json",
-            "class": "logging.handlers.RotatingFileHandler",
-            "filename": JSON_LOG_FILENAME,
-            "backupCount": 2,
-        },
-    },
-    "loggers": {
-        "erp": {
-            "level": "ERROR",
-            "handlers": ["verbose_output"],
-        },
-    },
-    "root": {
-        "level": "DEBUG",
-        "handlers": [
-            "logfile",
-            "errlogfile",
-            "jsonfile",
-        ],
-    },
-}
-
-logging.config.dictConfig(LOGGING_CONFIG)
+import atexit
+import importlib.util
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import List
+
+from api.config.settings import LoggingSettings
+
+LOG_FILENAME = "logs.log"
+ERROR_LOG_FILENAME = "error.log"
+JSON_LOG_FILENAME = "json.log"
+
+SQL_LOGGER = "sqlalchemy.engine"
+
+DEFAULT_FORMAT = (
+    "%(asctime)s::%(name)-70s::%(process)d::%(lineno)-4d:: "
+    "%(levelname)-7s :: %(message)s"
+)
+JSON_FORMAT = (
+    "%(asctime)s %(created)f %(filename)s %(funcName)s %(levelname)s "
+    "%(levelno)s %(lineno)d %(message)s %(module)s %(msecs)d %(name)s "
+    "%(pathname)s %(process)d %(processName)s %(relativeCreated)d "
+    "%(thread)d %(threadName)s"
+)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class SqlSampler(logging.Filter):
+    """
+    Пропускает только долю sample_rate записей sqlalchemy.engine ниже
+    WARNING: при DEBUG каждый запрос к БД дает несколько записей.
+    """
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if not record.name.startswith(SQL_LOGGER):
+            return True
+        return random.random() < self.sample_rate
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    Очередь внутри процесса: запись не нужно сериализовать, поэтому в
+    потоке запроса только подставляются аргументы сообщения (они могут
+    измениться позже). Форматирование, в том числе трассировки
+    исключений, и запись в файлы выполняет QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _build_handlers(settings: LoggingSettings) -> List[logging.Handler]:
+    os.makedirs(settings.dir, exist_ok=True)
+    default_formatter = logging.Formatter(DEFAULT_FORMAT, DATE_FORMAT)
+
+    def rotating(filename: str, level: int, formatter: logging.Formatter):
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(settings.dir, filename),
+            maxBytes=settings.max_bytes,
+            backupCount=settings.backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        handler.setLevel(level)
+        handler.setFormatter(formatter)
+        return handler
+
+    stdout = logging.StreamHandler(sys.stdout)
+    stdout.setFormatter(default_formatter)
+    handlers = [
+        stdout,
+        rotating(LOG_FILENAME, logging.NOTSET, default_formatter),
+        rotating(ERROR_LOG_FILENAME, logging.ERROR, default_formatter),
+    ]
+    # JSON-лог пишется, если установлен python-json-logger
+    if importlib.util.find_spec("pythonjsonlogger") is not None:
+        from pythonjsonlogger.jsonlogger import JsonFormatter
+
+        handlers.append(rotating(
+            JSON_LOG_FILENAME, logging.NOTSET,
+            JsonFormatter(JSON_FORMAT, DATE_FORMAT),
+        ))
+    return handlers
+
+
+def setup_logging(settings: LoggingSettings) -> logging.handlers.QueueListener:
+    """
+    Корневой логгер пишет только в очередь, обработчики работают в
+    отдельном потоке QueueListener. Файлы ротируются по размеру.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = LocalQueueHandler(log_queue)
+    queue_handler.addFilter(SqlSampler(settings.sql_sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(settings.level)
+    for name, level in settings.levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, *_build_handlers(settings), respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -1,11 +1,14 @@
 import os
 from dataclasses import dataclass, field
 
+from dotenv import load_dotenv
 from jinja2 import Environment, FileSystemLoader
 
+load_dotenv()
 
-def get_from_env(name) -> str:
-    value = os.getenv(name)
+
+def get_from_env(name, default: str | None = None) -> str:
+    value = os.getenv(name, default)
     if value is None:
         raise ValueError("Could not find environment variable %s" % name)
     return value
@@ -20,6 +23,13 @@ class PostgresSettings:
     database: str = field(init=False)
     url: str = field(init=False)
 
+    pool_size: int = field(init=False)
+    max_overflow: int = field(init=False)
+    pool_timeout: float = field(init=False)
+    pool_recycle: int = field(init=False)
+    pool_pre_ping: bool = field(init=False)
+    statement_cache_size: int = field(init=False)
+
     def __post_init__(self):
         self.host = get_from_env("POSTGRES_HOST")
         self.port = int(get_from_env("POSTGRES_PORT"))
@@ -34,6 +44,190 @@ class PostgresSettings:
             database=self.database,
         )
 
+        # Пул соединений на один воркер gunicorn: итоговое число соединений
+        # к Postgres = workers * (pool_size + max_overflow).
+        self.pool_size = int(get_from_env("POSTGRES_POOL_SIZE", "5"))
+        self.max_overflow = int(get_from_env("POSTGRES_MAX_OVERFLOW", "10"))
+        self.pool_timeout = float(get_from_env("POSTGRES_POOL_TIMEOUT", "30"))
+        self.pool_recycle = int(get_from_env("POSTGRES_POOL_RECYCLE", "1800"))
+        self.pool_pre_ping = (
+            get_from_env("POSTGRES_POOL_PRE_PING", "true") == "true"
+        )
+        self.statement_cache_size = int(
+            get_from_env("POSTGRES_STATEMENT_CACHE_SIZE", "100")
+        )
+
+
+@dataclass
+class ExportSettings:
+    executor: str = field(init=False)
+    max_workers: int = field(init=False)
+    max_queue: int = field(init=False)
+    spool_max_size: int = field(init=False)
+    cache_dir: str = field(init=False)
+    cache_max_bytes: int = field(init=False)
+    cache_max_entries: int = field(init=False)
+    jobs_workers: int = field(init=False)
+    jobs_poll_interval: float = field(init=False)
+    jobs_stale_after: int = field(init=False)
+    jobs_ttl: int = field(init=False)
+    jobs_dir: str = field(init=False)
+
+    def __post_init__(self):
+        # process — отдельные процессы (не держат GIL воркера),
+        # thread — пул потоков, если процессы недоступны
+        self.executor = get_from_env("EXPORT_EXECUTOR", "process")
+        self.max_workers = int(get_from_env("EXPORT_MAX_WORKERS", "2"))
+        # Сколько выгрузок может ждать свободного исполнителя,
+        # остальные получают 503
+        self.max_queue = int(get_from_env("EXPORT_MAX_QUEUE", "8"))
+        # Выгрузки Excel больше этого размера (байт) сбрасываются
+        # из памяти во временный файл
+        self.spool_max_size = int(
+            get_from_env("EXCEL_SPOOL_MAX_SIZE", str(16 * 1024 * 1024))
+        )
+        # Кэш книг каталога метрик, общий для всех воркеров
+        self.cache_dir = get_from_env(
+            "EXPORT_CACHE_DIR", "/files_download/table_maker"
+        )
+        self.cache_max_bytes = int(
+            get_from_env("EXPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+        )
+        self.cache_max_entries = int(
+            get_from_env("EXPORT_CACHE_MAX_ENTRIES", "32")
+        )
+        # Очередь заданий выгрузки: обработчиков на один воркер gunicorn,
+        # период опроса таблицы, через сколько секунд без обновлений
+        # задание считается брошенным и сколько хранятся результаты
+        self.jobs_workers = int(get_from_env("EXPORT_JOBS_WORKERS", "1"))
+        self.jobs_poll_interval = float(
+            get_from_env("EXPORT_JOBS_POLL_INTERVAL", "2")
+        )
+        self.jobs_stale_after = int(
+            get_from_env("EXPORT_JOBS_STALE_AFTER", "600")
+        )
+        self.jobs_ttl = int(get_from_env("EXPORT_JOBS_TTL", "86400"))
+        self.jobs_dir = get_from_env(
+            "EXPORT_JOBS_DIR", "/files_download/export_jobs"
+        )
+
+
+@dataclass
+class AuthApiSettings:
+    url: str = field(init=False)
+    connect_timeout: float = field(init=False)
+    read_timeout: float = field(init=False)
+    write_timeout: float = field(init=False)
+    pool_timeout: float = field(init=False)
+    max_connections: int = field(init=False)
+    max_keepalive_connections: int = field(init=False)
+    keepalive_expiry: float = field(init=False)
+    http2: bool = field(init=False)
+    breaker_failures: int = field(init=False)
+    breaker_reset: float = field(init=False)
+
+    def __post_init__(self):
+        self.url = get_from_env(
+            "AUTH_API_URL", "https://admin.kd.mospolytech.ru/api/v1/users"
+        )
+        # Таймауты по фазам запроса, секунды
+        self.connect_timeout = float(
+            get_from_env("AUTH_API_CONNECT_TIMEOUT", "3")
+        )
+        self.read_timeout = float(get_from_env("AUTH_API_READ_TIMEOUT", "10"))
+        self.write_timeout = float(
+            get_from_env("AUTH_API_WRITE_TIMEOUT", "5")
+        )
+        self.pool_timeout = float(get_from_env("AUTH_API_POOL_TIMEOUT", "2"))
+        # Соединения одного воркера gunicorn с сервисом авторизации
+        self.max_connections = int(
+            get_from_env("AUTH_API_MAX_CONNECTIONS", "20")
+        )
+        self.max_keepalive_connections = int(
+            get_from_env("AUTH_API_MAX_KEEPALIVE", "20")
+        )
+        self.keepalive_expiry = float(
+            get_from_env("AUTH_API_KEEPALIVE_EXPIRY", "30")
+        )
+        # HTTP/2 включается, только если установлен пакет h2
+        self.http2 = get_from_env("AUTH_API_HTTP2", "true") == "true"
+        # После breaker_failures ошибок подряд запросы отклоняются сразу,
+        # через breaker_reset секунд пропускается один пробный
+        self.breaker_failures = int(
+            get_from_env("AUTH_API_BREAKER_FAILURES", "5")
+        )
+        self.breaker_reset = float(
+            get_from_env("AUTH_API_BREAKER_RESET", "30")
+        )
+
+
+@dataclass
+class TokenAuthSettings:
+    jwks_url: str = field(init=False)
+    key: str = field(init=False)
+    algorithms: list = field(init=False)
+    audience: str | None = field(init=False)
+    issuer: str | None = field(init=False)
+    leeway: float = field(init=False)
+    identity_claim: str = field(init=False)
+    jwks_cache_ttl: int = field(init=False)
+    claims_cache_size: int = field(init=False)
+    employee_cache_size: int = field(init=False)
+    employee_cache_ttl: float = field(init=False)
+
+    def __post_init__(self):
+        # Ключи подписи: JWKS сервиса авторизации или один ключ
+        # (PEM открытого ключа либо секрет HS256). Без них токены
+        # не проверяются и защищенные маршруты отвечают 503.
+        self.jwks_url = get_from_env("JWT_JWKS_URL", "")
+        self.key = get_from_env("JWT_KEY", "").replace("\\n", "\n")
+        self.algorithms = get_from_env("JWT_ALGORITHMS", "RS256").split(",")
+        self.audience = get_from_env("JWT_AUDIENCE", "") or None
+        self.issuer = get_from_env("JWT_ISSUER", "") or None
+        self.leeway = float(get_from_env("JWT_LEEWAY", "0"))
+        # Claim с логином сотрудника (employees.login)
+        self.identity_claim = get_from_env("JWT_IDENTITY_CLAIM", "sub")
+        self.jwks_cache_ttl = int(get_from_env("JWT_JWKS_CACHE_TTL", "3600"))
+        # Разобранные токены хранятся до истечения exp, сотрудники —
+        # employee_cache_ttl секунд
+        self.claims_cache_size = int(
+            get_from_env("JWT_CLAIMS_CACHE_SIZE", "10000")
+        )
+        self.employee_cache_size = int(
+            get_from_env("JWT_EMPLOYEE_CACHE_SIZE", "1000")
+        )
+        self.employee_cache_ttl = float(
+            get_from_env("JWT_EMPLOYEE_CACHE_TTL", "60")
+        )
+
+
+@dataclass
+class LoggingSettings:
+    level: str = field(init=False)
+    levels: dict = field(init=False)
+    dir: str = field(init=False)
+    max_bytes: int = field(init=False)
+    backup_count: int = field(init=False)
+    sql_sample_rate: float = field(init=False)
+
+    def __post_init__(self):
+        self.level = get_from_env("LOG_LEVEL", "info").upper()
+        # Уровни отдельных логгеров: "sqlalchemy.engine=INFO,httpx=WARNING"
+        self.levels = {}
+        for item in get_from_env("LOG_LEVELS", "").split(","):
+            if item.strip():
+                name, level = item.split("=", 1)
+                self.levels[name.strip()] = level.strip().upper()
+        self.dir = get_from_env("LOG_DIR", "logs")
+        self.max_bytes = int(
+            get_from_env("LOG_MAX_BYTES", str(10 * 1024 * 1024))
+        )
+        self.backup_count = int(get_from_env("LOG_BACKUP_COUNT", "5"))
+        # Доля записей sqlalchemy.engine ниже WARNING, попадающих в лог
+        self.sql_sample_rate = float(
+            get_from_env("LOG_SQL_SAMPLE_RATE", "0.01")
+        )
+
 
 @dataclass
 class Settings:
@@ -47,10 +241,29 @@ class Settings:
     site_api_path: str = field(init=False)
     docs_url: str = field(init=False)
 
+    metrics_archive_after_years: int = field(init=False)
+    metrics_archive_interval: float = field(init=False)
+
     database: PostgresSettings = field(
         init=False,
         default_factory=PostgresSettings,
     )
+    export: ExportSettings = field(
+        init=False,
+        default_factory=ExportSettings,
+    )
+    auth_api: AuthApiSettings = field(
+        init=False,
+        default_factory=AuthApiSettings,
+    )
+    token_auth: TokenAuthSettings = field(
+        init=False,
+        default_factory=TokenAuthSettings,
+    )
+    log: LoggingSettings = field(
+        init=False,
+        default_factory=LoggingSettings,
+    )
 
     def __post_init__(self):
         self.domain = get_from_env("DOMAIN")
@@ -63,3 +276,12 @@ class Settings:
         self.port = int(get_from_env("BACKEND_PORT"))
         self.site_api_path = get_from_env("SITE_API_PATH")
         self.docs_url = get_from_env("DOCS_URL")
+
+        # Неактивные версии метрик старше N лет переносятся в историю,
+        # проверка раз в metrics_archive_interval секунд (0 — отключено)
+        self.metrics_archive_after_years = int(
+            get_from_env("METRICS_ARCHIVE_AFTER_YEARS", "3")
+        )
+        self.metrics_archive_interval = float(
+            get_from_env("METRICS_ARCHIVE_INTERVAL", "86400")
+        )
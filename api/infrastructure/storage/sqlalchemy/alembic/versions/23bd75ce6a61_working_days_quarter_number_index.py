@@ -0,0 +1,38 @@
+"""working days quarter number index
+
+Revision ID: 23bd75ce6a61
+Revises: edf167b331ca
+Create Date: 2026-10-18 12:20:31.804117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '23bd75ce6a61'
+down_revision = 'edf167b331ca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_actual_working_days_on_employee_department_id_quarter_number',
+            'actual_working_days_on_employee',
+            ['department_id', sa.text('(year * 4 + quarter - 1)')],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_actual_working_days_on_employee_department_id_quarter_number',
+            table_name='actual_working_days_on_employee',
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
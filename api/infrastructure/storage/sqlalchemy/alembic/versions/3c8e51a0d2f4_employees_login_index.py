@@ -0,0 +1,37 @@
+"""employees login index
+
+Revision ID: 3c8e51a0d2f4
+Revises: e703e31f48ec
+Create Date: 2026-10-18 18:42:09.115273
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e51a0d2f4'
+down_revision = 'e703e31f48ec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_employees_login',
+            'employees',
+            ['login'],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_employees_login',
+            table_name='employees',
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,47 @@
+"""departments metrics natural key
+
+Revision ID: 69331e5faa8d
+Revises: 23bd75ce6a61
+Create Date: 2026-10-18 13:05:12.447920
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '69331e5faa8d'
+down_revision = '23bd75ce6a61'
+branch_labels = None
+depends_on = None
+
+
+CONSTRAINT = 'uq_departments_metrics_natural_key'
+COLUMNS = ['department_id', 'metrics_id', 'author_id', 'year', 'quarter']
+
+
+def upgrade() -> None:
+    # Оставляем только последнюю оценку для каждого натурального ключа
+    op.execute(
+        'DELETE FROM departments_metrics older '
+        'USING departments_metrics newer '
+        'WHERE ' + ' AND '.join(
+            f'older.{column} = newer.{column}' for column in COLUMNS
+        ) + ' AND older.id < newer.id'
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            CONSTRAINT,
+            'departments_metrics',
+            COLUMNS,
+            unique=True,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+    op.execute(
+        f'ALTER TABLE departments_metrics '
+        f'ADD CONSTRAINT {CONSTRAINT} UNIQUE USING INDEX {CONSTRAINT}'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(CONSTRAINT, 'departments_metrics', type_='unique')
@@ -0,0 +1,83 @@
+"""metric descriptions history
+
+Revision ID: e703e31f48ec
+Revises: f1f680f38e0b
+Create Date: 2026-10-18 16:31:54.207113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e703e31f48ec'
+down_revision = 'f1f680f38e0b'
+branch_labels = None
+depends_on = None
+
+
+VALIDITY = sa.text("daterange(date_start, date_end, '[)')")
+COLUMNS = (
+    'metric_id, metric_number, metric_subnumber, description, '
+    'unit_of_measurement, base_level, average_level, goal_level, '
+    'measurement_frequency, conditions, notes, points, section_id, '
+    'date_start, date_end, is_active'
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metric_descriptions_history',
+        sa.Column('metric_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('metric_number', sa.Integer(), nullable=True),
+        sa.Column('metric_subnumber', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('unit_of_measurement', sa.String(), nullable=True),
+        sa.Column('base_level', sa.String(), nullable=True),
+        sa.Column('average_level', sa.String(), nullable=True),
+        sa.Column('goal_level', sa.String(), nullable=True),
+        sa.Column('measurement_frequency', sa.String(), nullable=True),
+        sa.Column('conditions', sa.String(), nullable=True),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('points', sa.Integer(), nullable=True),
+        sa.Column('section_id', sa.Integer(), nullable=True),
+        sa.Column('date_start', sa.Date(), nullable=True),
+        sa.Column('date_end', sa.Date(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('archived_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('metric_id', name=op.f('pk_metric_descriptions_history')),
+    )
+    op.create_index(
+        'ix_metric_descriptions_history_validity',
+        'metric_descriptions_history',
+        [VALIDITY],
+        unique=False,
+        postgresql_using='gist',
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_metric_descriptions_validity',
+            'metric_descriptions',
+            [VALIDITY],
+            unique=False,
+            if_not_exists=True,
+            postgresql_using='gist',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_metric_descriptions_validity',
+            table_name='metric_descriptions',
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+    # Перенесенные версии возвращаются в основную таблицу
+    op.execute(
+        f'INSERT INTO metric_descriptions ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM metric_descriptions_history'
+    )
+    op.drop_index('ix_metric_descriptions_history_validity', table_name='metric_descriptions_history')
+    op.drop_table('metric_descriptions_history')
@@ -0,0 +1,46 @@
+"""kpi tables id sequences
+
+Revision ID: edf167b331ca
+Revises: eef1bf39dc10
+Create Date: 2026-10-18 11:02:47.190823
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'edf167b331ca'
+down_revision = 'eef1bf39dc10'
+branch_labels = None
+depends_on = None
+
+
+TABLES = [
+    'departments_metrics',
+    'employees_to_metrics',
+]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        sequence = f'{table}_id_seq'
+        op.execute(
+            f'CREATE SEQUENCE IF NOT EXISTS {sequence} OWNED BY {table}.id'
+        )
+        op.execute(
+            f"ALTER TABLE {table} "
+            f"ALTER COLUMN id SET DEFAULT nextval('{sequence}')"
+        )
+        # Ключи раньше выдавались как MAX(id) + 1, поэтому
+        # последовательность нужно подтянуть к текущему максимуму.
+        op.execute(
+            f"SELECT setval('{sequence}', "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        )
+
+
+def downgrade() -> None:
+    # Последовательности могли существовать до этой ревизии (serial),
+    # поэтому откатываем только значение по умолчанию для id.
+    for table in TABLES:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT')
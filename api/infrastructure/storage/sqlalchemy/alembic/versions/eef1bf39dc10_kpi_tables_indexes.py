@@ -0,0 +1,107 @@
+"""kpi tables indexes
+
+Revision ID: eef1bf39dc10
+Revises: b9a09736ad5a
+Create Date: 2026-10-18 10:12:04.512331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'eef1bf39dc10'
+down_revision = 'b9a09736ad5a'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, extra create_index kwargs)
+INDEXES = [
+    (
+        'ix_departments_metrics_department_id_year_quarter',
+        'departments_metrics',
+        ['department_id', 'year', 'quarter'],
+        {},
+    ),
+    (
+        'ix_departments_metrics_author_id_metrics_id_year_quarter',
+        'departments_metrics',
+        ['author_id', 'metrics_id', 'year', 'quarter'],
+        {},
+    ),
+    (
+        'ix_actual_working_days_on_employee_employee_department_year',
+        'actual_working_days_on_employee',
+        ['employee_id', 'department_id', 'year'],
+        {},
+    ),
+    (
+        'ix_actual_working_days_on_employee_department_id_year_quarter',
+        'actual_working_days_on_employee',
+        ['department_id', 'year', 'quarter'],
+        {},
+    ),
+    (
+        'ix_actual_working_days_year_quarter',
+        'actual_working_days',
+        ['year', 'quarter'],
+        {},
+    ),
+    (
+        'ix_employees_to_metrics_employee_id_year_quarter',
+        'employees_to_metrics',
+        ['employee_id', 'year', 'quarter'],
+        {},
+    ),
+    (
+        'ix_employees_to_metrics_metrics_id',
+        'employees_to_metrics',
+        ['metrics_id'],
+        {'postgresql_using': 'gin'},
+    ),
+    (
+        'ix_metrics_in_quartal_quartal',
+        'metrics_in_quartal',
+        ['quartal'],
+        {},
+    ),
+    (
+        'ix_metrics_in_quartal_metrics_id',
+        'metrics_in_quartal',
+        ['metrics_id'],
+        {'postgresql_using': 'gin'},
+    ),
+    (
+        'ix_metric_descriptions_active_section_id_metric_number',
+        'metric_descriptions',
+        ['section_id', 'metric_number', 'metric_subnumber'],
+        {'postgresql_where': sa.text('is_active')},
+    ),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
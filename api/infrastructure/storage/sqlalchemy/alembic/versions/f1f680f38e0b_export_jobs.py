@@ -0,0 +1,59 @@
+"""export jobs
+
+Revision ID: f1f680f38e0b
+Revises: 69331e5faa8d
+Create Date: 2026-10-18 15:42:09.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1f680f38e0b'
+down_revision = '69331e5faa8d'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE = sa.text("status IN ('pending', 'running')")
+
+
+def upgrade() -> None:
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('dedup_key', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), server_default='pending', nullable=False),
+        sa.Column('progress', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('result_path', sa.String(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_export_jobs')),
+    )
+    op.execute('CREATE SEQUENCE IF NOT EXISTS export_jobs_id_seq OWNED BY export_jobs.id')
+    op.execute("ALTER TABLE export_jobs ALTER COLUMN id SET DEFAULT nextval('export_jobs_id_seq')")
+    op.create_index(
+        'uq_export_jobs_active_dedup_key',
+        'export_jobs',
+        ['dedup_key'],
+        unique=True,
+        postgresql_where=ACTIVE,
+    )
+    op.create_index(
+        'ix_export_jobs_claim',
+        'export_jobs',
+        ['status', 'id'],
+        unique=False,
+        postgresql_where=ACTIVE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_export_jobs_claim', table_name='export_jobs')
+    op.drop_index('uq_export_jobs_active_dedup_key', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -13,10 +13,31 @@ from api.config import Settings
 def build_sa_engine(
     settings: Settings,
 ) -> AsyncEngine:
-    engine = create_async_engine(settings.database.url)
+    db = settings.database
+    engine = create_async_engine(
+        db.url,
+        pool_size=db.pool_size,
+        max_overflow=db.max_overflow,
+        pool_timeout=db.pool_timeout,
+        pool_recycle=db.pool_recycle,
+        pool_pre_ping=db.pool_pre_ping,
+        connect_args={"statement_cache_size": db.statement_cache_size},
+    )
     return engine
 
 
+def get_sa_pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+    }
+
+
 def build_sa_session_factory(
     engine: AsyncEngine,
     class_: Type[AsyncSession] = AsyncSession,
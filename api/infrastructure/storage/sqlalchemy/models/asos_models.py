@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import MetaData, Boolean, TIMESTAMP, JSON, Table, Column, Integer, String, ForeignKey, Date
+from sqlalchemy import MetaData, Boolean, TIMESTAMP, JSON, Table, Column, Integer, String, ForeignKey, Date, Index, Sequence, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import declarative_base
 
@@ -24,6 +24,9 @@ class Role(Base):
 
 class Employee(Base):
     __tablename__ = 'employees'
+    __table_args__ = (
+        Index('ix_employees_login', 'login'),
+    )
     
     employee_id = Column(Integer, primary_key=True)
     first_name = Column(String)
@@ -68,6 +71,19 @@ class Section(Base):
 
 class MetricDescription(Base):
     __tablename__ = 'metric_descriptions'
+    __table_args__ = (
+        Index(
+            'ix_metric_descriptions_active_section_id_metric_number',
+            'section_id', 'metric_number', 'metric_subnumber',
+            postgresql_where=text('is_active'),
+        ),
+        # Поиск версий, действовавших на дату (см. metrics.metric_valid_on)
+        Index(
+            'ix_metric_descriptions_validity',
+            text("daterange(date_start, date_end, '[)')"),
+            postgresql_using='gist',
+        ),
+    )
     
     metric_id = Column(Integer, primary_key=True)
     metric_number = Column(Integer)
@@ -113,8 +129,42 @@ class MetricDescription(Base):
         }
 
 
+class MetricDescriptionHistory(Base):
+    """Устаревшие версии метрик, перенесенные из metric_descriptions"""
+    __tablename__ = 'metric_descriptions_history'
+    __table_args__ = (
+        Index(
+            'ix_metric_descriptions_history_validity',
+            text("daterange(date_start, date_end, '[)')"),
+            postgresql_using='gist',
+        ),
+    )
+
+    metric_id = Column(Integer, primary_key=True, autoincrement=False)
+    metric_number = Column(Integer)
+    metric_subnumber = Column(String)
+    description = Column(String)
+    unit_of_measurement = Column(String)
+    base_level = Column(String)
+    average_level = Column(String)
+    goal_level = Column(String)
+    measurement_frequency = Column(String)
+    conditions = Column(String)
+    notes = Column(String)
+    points = Column(Integer)
+    section_id = Column(Integer)
+    date_start = Column(Date)
+    date_end = Column(Date)
+    is_active = Column(Boolean)
+    archived_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+
+
 class MetricsInQuartal(Base):
     __tablename__ = 'metrics_in_quartal'
+    __table_args__ = (
+        Index('ix_metrics_in_quartal_quartal', 'quartal'),
+        Index('ix_metrics_in_quartal_metrics_id', 'metrics_id', postgresql_using='gin'),
+    )
     
     id = Column(Integer, primary_key=True)
     quartal = Column(Integer)
@@ -142,6 +192,9 @@ class EmployeeResponsibility(Base):
 
 class ActualWorkingDays(Base):
     __tablename__ = 'actual_working_days'
+    __table_args__ = (
+        Index('ix_actual_working_days_year_quarter', 'year', 'quarter'),
+    )
     
     id = Column(Integer, primary_key=True)
     year = Column(Integer, nullable=False)
@@ -152,6 +205,20 @@ class ActualWorkingDays(Base):
 
 class ActualWorkingDaysOnEmployee(Base):
     __tablename__ = 'actual_working_days_on_employee'
+    __table_args__ = (
+        Index(
+            'ix_actual_working_days_on_employee_employee_department_year',
+            'employee_id', 'department_id', 'year',
+        ),
+        Index(
+            'ix_actual_working_days_on_employee_department_id_year_quarter',
+            'department_id', 'year', 'quarter',
+        ),
+        Index(
+            'ix_actual_working_days_on_employee_department_id_quarter_number',
+            'department_id', text('(year * 4 + quarter - 1)'),
+        ),
+    )
     
     id = Column(Integer, primary_key=True)
     employee_id = Column(Integer, ForeignKey("employees.employee_id"))
@@ -165,8 +232,22 @@ class ActualWorkingDaysOnEmployee(Base):
 
 class DepartmentsMetrics(Base):
     __tablename__ = 'departments_metrics'
+    __table_args__ = (
+        Index(
+            'ix_departments_metrics_department_id_year_quarter',
+            'department_id', 'year', 'quarter',
+        ),
+        Index(
+            'ix_departments_metrics_author_id_metrics_id_year_quarter',
+            'author_id', 'metrics_id', 'year', 'quarter',
+        ),
+        UniqueConstraint(
+            'department_id', 'metrics_id', 'author_id', 'year', 'quarter',
+            name='uq_departments_metrics_natural_key',
+        ),
+    )
     
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Sequence('departments_metrics_id_seq'), primary_key=True)
     department_id = Column(Integer, ForeignKey("departments.id"))
     value = Column(Integer)
     year = Column(Integer)
@@ -179,11 +260,48 @@ class DepartmentsMetrics(Base):
 
 class EmployeesToMetrics(Base):
     __tablename__ = 'employees_to_metrics'
+    __table_args__ = (
+        Index(
+            'ix_employees_to_metrics_employee_id_year_quarter',
+            'employee_id', 'year', 'quarter',
+        ),
+        Index('ix_employees_to_metrics_metrics_id', 'metrics_id', postgresql_using='gin'),
+    )
     
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Sequence('employees_to_metrics_id_seq'), primary_key=True)
     metrics_id = Column(ARRAY(Integer))
     year = Column(Integer)
     quarter = Column(Integer)
     date_start = Column(Date)
     date_end = Column(Date)
-    employee_id = Column(Integer, ForeignKey("employees.employee_id"))
\ No newline at end of file
+    employee_id = Column(Integer, ForeignKey("employees.employee_id"))
+
+
+class ExportJob(Base):
+    __tablename__ = 'export_jobs'
+    __table_args__ = (
+        # Одинаковые выгрузки, которые ждут или выполняются, не дублируются
+        Index(
+            'uq_export_jobs_active_dedup_key',
+            'dedup_key',
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+        Index(
+            'ix_export_jobs_claim',
+            'status', 'id',
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    id = Column(Integer, Sequence('export_jobs_id_seq'), primary_key=True)
+    kind = Column(String, nullable=False)
+    dedup_key = Column(String, nullable=False)
+    status = Column(String, nullable=False, server_default='pending')
+    progress = Column(Integer, nullable=False, server_default='0')
+    attempts = Column(Integer, nullable=False, server_default='0')
+    result_path = Column(String)
+    error = Column(String)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    finished_at = Column(TIMESTAMP(timezone=True))
@@ -1,25 +1,17 @@
-import os
 from typing import AsyncGenerator
 
-from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
 
-load_dotenv()
 
-DB_HOST = os.getenv('POSTGRES_HOST')
-DB_NAME = os.getenv('POSTGRES_DB')
-DB_PASS = os.getenv('POSTGRES_PASSWORD')
-DB_PORT = os.getenv('POSTGRES_PORT')
-DB_USER = os.getenv('POSTGRES_USER')
+async def get_async_session(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия из единственного пула соединений приложения.
 
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-Base = declarative_base()
-
-engine = create_async_engine(DATABASE_URL)
-async_sessions_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_sessions_maker() as session:
-        yield session
\ No newline at end of file
+    Движок и фабрика сессий создаются в lifespan (см. setup_di) и
+    хранятся в app.state, поэтому каждый воркер держит ровно один пул.
+    """
+    async with request.app.state.sa_session_factory() as session:
+        yield session
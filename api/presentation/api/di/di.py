@@ -1,13 +1,29 @@
-from typing import AsyncGenerator
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.config.settings import Settings
 from api.infrastructure.storage.sqlalchemy.factories import (
     build_sa_engine,
     build_sa_session_factory,
 )
+from api.infrastructure.storage.sqlalchemy.session_maker import (
+    get_async_session,
+)
+from api.presentation.api.v1.auth_api_client import AuthApiClient
+from api.presentation.api.v1.export_jobs import ExportJobWorker
+from api.presentation.api.v1.metrics import run_metric_archive
+from api.presentation.api.v1.reference_cache import ReferenceCache
+from api.presentation.api.v1.table_maker_3.catalog_cache import (
+    CatalogWorkbookCache,
+)
+from api.presentation.api.v1.table_maker_3.export_pool import ExportPool
+from api.presentation.api.v1.token_auth import (
+    EmployeeDirectory,
+    TokenVerifier,
+)
 from api.presentation.api.di.stubs import (  # noqa: E501, F401
     provide_settings_stub,
     provide_sqlalchemy_session_stub,
@@ -20,23 +36,127 @@ from api.presentation.api.di.stubs import (  # noqa: E501, F401
 )
 
 
-def get_sqlalchemy_session_factory(settings: Settings):
+@asynccontextmanager
+async def sqlalchemy_lifespan(
+    app: FastAPI, settings: Settings
+) -> AsyncIterator[None]:
     engine = build_sa_engine(settings)
-    session_factory = build_sa_session_factory(engine)
+    app.state.sa_engine = engine
+    app.state.sa_session_factory = build_sa_session_factory(engine)
+    try:
+        yield
+    finally:
+        await engine.dispose()
 
-    async def sesstion_generator() -> AsyncGenerator[AsyncSession, None]:
-        async with session_factory() as session:
-            yield session
 
-    return sesstion_generator
+@asynccontextmanager
+async def reference_cache_lifespan(
+    app: FastAPI, settings: Settings
+) -> AsyncIterator[None]:
+    cache = ReferenceCache(app.state.sa_session_factory)
+    app.state.reference_cache = cache
+    listener = asyncio.create_task(cache.listen(settings.database))
+    try:
+        yield
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
 
 
-def setup_di(app: FastAPI, settings: Settings):
-    sqlalchemy_session_factory = get_sqlalchemy_session_factory(settings)
+@asynccontextmanager
+async def export_pool_lifespan(
+    app: FastAPI, settings: Settings
+) -> AsyncIterator[None]:
+    pool = ExportPool(
+        settings.export.executor,
+        settings.export.max_workers,
+        settings.export.max_queue,
+        settings.export.spool_max_size,
+    )
+    app.state.export_pool = pool
+    cache = CatalogWorkbookCache(
+        settings.export.cache_dir,
+        settings.export.cache_max_bytes,
+        settings.export.cache_max_entries,
+    )
+    cache.setup()
+    app.state.catalog_cache = cache
+    try:
+        yield
+    finally:
+        pool.shutdown()
+
+
+@asynccontextmanager
+async def export_jobs_lifespan(
+    app: FastAPI, settings: Settings
+) -> AsyncIterator[None]:
+    worker = ExportJobWorker(
+        app,
+        settings.export.jobs_poll_interval,
+        settings.export.jobs_stale_after,
+        settings.export.jobs_ttl,
+        settings.export.jobs_dir,
+    )
+    tasks = [
+        asyncio.create_task(worker.run())
+        for _ in range(settings.export.jobs_workers)
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
+
+@asynccontextmanager
+async def metric_archive_lifespan(
+    app: FastAPI, settings: Settings
+) -> AsyncIterator[None]:
+    if settings.metrics_archive_interval <= 0:
+        yield
+        return
+    task = asyncio.create_task(run_metric_archive(
+        app.state.sa_session_factory,
+        settings.metrics_archive_after_years,
+        settings.metrics_archive_interval,
+    ))
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+@asynccontextmanager
+async def auth_api_lifespan(
+    app: FastAPI, settings: Settings
+) -> AsyncIterator[None]:
+    client = AuthApiClient(settings.auth_api)
+    app.state.auth_api_client = client
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def token_auth_lifespan(
+    app: FastAPI, settings: Settings
+) -> AsyncIterator[None]:
+    app.state.token_verifier = TokenVerifier(settings.token_auth)
+    app.state.employee_directory = EmployeeDirectory(
+        app.state.sa_session_factory, settings.token_auth
+    )
+    yield
+
+
+def setup_di(app: FastAPI, settings: Settings):
+    app.state.settings = settings
     app.dependency_overrides.update(
         {
             provide_settings_stub: lambda: settings,
-            provide_sqlalchemy_session_stub: sqlalchemy_session_factory,
+            provide_sqlalchemy_session_stub: get_async_session,
         }
     )
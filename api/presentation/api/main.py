@@ -1,38 +1,69 @@
 import logging
 from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
 
 from fastapi import FastAPI, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import ValidationError
 
+from api.config.logger import setup_logging
 from api.config.settings import Settings
-from api.presentation.api.di.di import setup_di
+from api.presentation.api.di.di import (
+    auth_api_lifespan,
+    export_jobs_lifespan,
+    export_pool_lifespan,
+    metric_archive_lifespan,
+    reference_cache_lifespan,
+    setup_di,
+    sqlalchemy_lifespan,
+    token_auth_lifespan,
+)
 from api.presentation.api.middlewares import setup_middleware
 from api.presentation.api.routes import router
 from api.presentation.api.v1.dto import HTTPException
 
 from .open_api import set_custom_openapi
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
 def create_app() -> FastAPI:
     settings = Settings()
+    setup_logging(settings.log)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(
+                sqlalchemy_lifespan(app, settings)
+            )
+            await stack.enter_async_context(
+                reference_cache_lifespan(app, settings)
+            )
+            await stack.enter_async_context(
+                export_pool_lifespan(app, settings)
+            )
+            await stack.enter_async_context(
+                export_jobs_lifespan(app, settings)
+            )
+            await stack.enter_async_context(
+                metric_archive_lifespan(app, settings)
+            )
+            await stack.enter_async_context(
+                auth_api_lifespan(app, settings)
+            )
+            await stack.enter_async_context(
+                token_auth_lifespan(app, settings)
+            )
+            yield
+
     app = FastAPI(
         root_path=settings.site_api_path,
         docs_url=settings.docs_url,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.cors_allow_origins,
-        allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
-        allow_headers=["*"],
-    )
-
     app.include_router(router)
     setup_di(app, settings)
     set_custom_openapi(app, settings)
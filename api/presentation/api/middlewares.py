@@ -1,45 +1,68 @@
 import logging
 
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from api.config import Settings
 from api.presentation.api.v1.dto import HTTPException
 
 logger = logging.getLogger(__name__)
-origins = ["*"]
-
-
-async def error_header(
-    request: Request,
-    call_next,
-):
-    err_content = None
-    try:
-        response = await call_next(request)
-    except Exception as e:
-        logger.error(str(e), exc_info=True)
-        err_content = "error"
-    if err_content is not None:
-        err = JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=HTTPException(
+
+
+class ErrorResponseMiddleware:
+    """
+    Необработанное исключение превращается в ответ 400 "Invalid request".
+
+    Чистый ASGI: без отдельной задачи и потока сообщений на запрос, как
+    у BaseHTTPMiddleware, и без буферизации потоковых ответов. Если
+    ответ уже начал отправляться, заменить его нельзя — исключение
+    пробрасывается дальше.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error(str(e), exc_info=True)
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid request",
-                errors=err_content,
-            ).model_dump(),
-        )
-        return err
-    return response
+                content=HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid request",
+                    errors="error",
+                ).model_dump(),
+            )
+            await response(scope, receive, send)
 
 
 def setup_middleware(app: FastAPI, settings: Settings):
-    app.add_middleware(BaseHTTPMiddleware, dispatch=error_header)
+    # Последний добавленный слой внешний: CORS добавляет заголовки
+    # и к ответам об ошибке
+    app.add_middleware(ErrorResponseMiddleware)
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=origins + ["http://" + settings.client_domain],
+        allow_origins=(
+            settings.cors_allow_origins + ["http://" + settings.client_domain]
+        ),
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
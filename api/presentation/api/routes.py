@@ -17,7 +17,9 @@ from api.presentation.api.v1 import (
     employees_to_scores,
     departments,          
     departments_metrics,
-    metrics_quartal   
+    metrics_quartal,
+    system,
+    export_jobs,
 )
 
 settings = Settings()
@@ -40,4 +42,6 @@ router.include_router(employees_to_department.router, tags=["employees_to_depart
 router.include_router(auth_polytech.router, tags=["auth_polytech"])
 router.include_router(departments.router, prefix="/departments", tags=["departments"])
 router.include_router(departments_metrics.router, tags=["departments_metrics"])
-router.include_router(metrics_quartal.router, tags=["metrics_quartal"])
\ No newline at end of file
+router.include_router(metrics_quartal.router, tags=["metrics_quartal"])
+router.include_router(system.router, prefix="/system", tags=["system"])
+router.include_router(export_jobs.router, prefix="/export_jobs", tags=["export_jobs"])
@@ -1,9 +1,15 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import Employee
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.token_auth import Identity, get_current_identity
 from fastapi import APIRouter, Body, Response, Depends, Query
 from fastapi.responses import FileResponse
 from passlib.context import CryptContext
@@ -11,6 +17,32 @@ from passlib.context import CryptContext
 
 router = APIRouter()
 
+# Контекст создается один раз на процесс: разбор схем и загрузка backend
+# bcrypt не должны повторяться на каждый запрос
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt намеренно медленный и отпускает GIL, поэтому проверка идет в
+# отдельных потоках, по одному на ядро. Общий пул потоков starlette
+# при наплыве входов не занимается.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt"
+)
+
+
+def _verify(password: str, password_hash: Optional[str]) -> bool:
+    if not password_hash or pwd_context.identify(password_hash) is None:
+        # Время ответа не должно выдавать, что логина нет
+        pwd_context.dummy_verify()
+        return False
+    return pwd_context.verify(password, password_hash)
+
+
+async def verify_password(password: str, password_hash: Optional[str]) -> bool:
+    """Сверяет пароль с хэшем из БД, не блокируя цикл событий"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _verify, password, password_hash)
+
+
 @router.get(
     path="/auth",
     status_code=status.HTTP_200_OK,
@@ -20,14 +52,33 @@ async def get_emploee(
     password: str = Query(..., description="Пароль"),
     sessions: AsyncSession = Depends(get_async_session)
     ):
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    password_hash = pwd_context.hash(password)
-    query = select(Employee).where(Employee.login == login and Employee.password == password_hash)
-    result = await sessions.execute(query)
-    list_user = result.one_or_none()
-    if list_user is None:
+    # Поиск по индексу ix_employees_login, хэш проверяется отдельно:
+    # соль в хэше не позволяет сравнить его в запросе
+    query = (
+        select(Employee.employee_id, Employee.password)
+        .where(Employee.login == login)
+        .limit(1)
+    )
+    employee = (await sessions.execute(query)).one_or_none()
+    password_hash = employee.password if employee is not None else None
+    if not await verify_password(password, password_hash):
         return {"status": "Employee not found"}
     response_data = {
-        "employee_id": list_user[0].employee_id
+        "employee_id": employee.employee_id
+    }
+    return {"status": "OK", "data": response_data}
+
+
+@router.get(
+    path="/me",
+    status_code=status.HTTP_200_OK,
+)
+async def get_me(identity: Identity = Depends(get_current_identity)):
+    """Сотрудник, которому выдан токен доступа"""
+    response_data = {
+        "employee_id": identity.employee_id,
+        "login": identity.login,
+        "role_id": identity.role_id,
+        "role": identity.role,
     }
     return {"status": "OK", "data": response_data}
@@ -0,0 +1,164 @@
+import importlib.util
+import logging
+import math
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from api.config.settings import AuthApiSettings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class AuthApiUnavailable(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Auth API is unavailable")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи для внешнего сервиса.
+
+    После failure_threshold ошибок подряд цепь размыкается: запросы
+    отклоняются сразу, без ожидания таймаутов. Через reset_timeout
+    секунд пропускается один пробный запрос: успех замыкает цепь,
+    ошибка снова размыкает ее.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int,
+            reset_timeout: float,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning("Auth API circuit opened after %s failures", self.failures)
+            self.state = OPEN
+            self._opened_at = self._clock()
+
+    def release(self):
+        """Запрос прерван без результата: пробный запрос можно повторить"""
+        self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        if self.state != OPEN:
+            return 1
+        remaining = self.reset_timeout - (self._clock() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class AuthApiClient:
+    """
+    Общий на воркер клиент сервиса авторизации Политеха.
+
+    Соединения переиспользуются между запросами (keep-alive), поэтому
+    вход не платит за новое TCP/TLS-рукопожатие. Ошибки соединения,
+    таймауты и ответы 5xx считаются отказом сервиса и размыкают цепь;
+    ответы 4xx возвращаются вызывающему как есть.
+    """
+
+    def __init__(
+            self,
+            settings: AuthApiSettings,
+            transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.http2 = settings.http2 and http2_available()
+        self.breaker = CircuitBreaker(
+            settings.breaker_failures, settings.breaker_reset
+        )
+        self._client = httpx.AsyncClient(
+            base_url=settings.url,
+            timeout=httpx.Timeout(
+                connect=settings.connect_timeout,
+                read=settings.read_timeout,
+                write=settings.write_timeout,
+                pool=settings.pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=settings.keepalive_expiry,
+            ),
+            http2=self.http2,
+            transport=transport,
+        )
+
+        self.requests = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def post(self, path: str, payload: Dict) -> httpx.Response:
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise AuthApiUnavailable(self.breaker.retry_after())
+
+        self.requests += 1
+        try:
+            response = await self._client.post(path, json=payload)
+        except httpx.TransportError as exc:
+            self._fail("Auth API request failed: %r", exc)
+        except BaseException:
+            self.breaker.release()
+            raise
+
+        if response.status_code >= 500:
+            self._fail("Auth API responded with %s", response.status_code)
+        self.breaker.record_success()
+        return response
+
+    def _fail(self, message: str, arg):
+        logger.info(message, arg)
+        self.failed += 1
+        self.breaker.record_failure()
+        raise AuthApiUnavailable(self.breaker.retry_after())
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "requests": self.requests,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
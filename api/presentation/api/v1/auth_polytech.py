@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 from typing import Dict
-import httpx
-from httpx import AsyncClient
+
+from api.presentation.api.v1.auth_api_client import (
+    AuthApiClient,
+    AuthApiUnavailable,
+)
 
 router = APIRouter(
     prefix="/auth_polytech",
@@ -25,31 +28,34 @@ class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
 
-# Конфигурация API
-AUTH_API_URL = "https://admin.kd.mospolytech.ru/api/v1/users"
-LOGIN_ENDPOINT = f"{AUTH_API_URL}/login"
-VERIFY_ENDPOINT = f"{AUTH_API_URL}/verification_auth_code"
+# Пути относительно AUTH_API_URL (см. AuthApiSettings)
+LOGIN_ENDPOINT = "/login"
+VERIFY_ENDPOINT = "/verification_auth_code"
 
-async def get_auth_client() -> AsyncClient:
-    """Получение асинхронного HTTP клиента"""
-    async with AsyncClient(base_url=AUTH_API_URL, timeout=30.0) as client:
-        yield client
+def get_auth_client(request: Request) -> AuthApiClient:
+    """Общий клиент воркера, создается в auth_api_lifespan"""
+    return request.app.state.auth_api_client
 
 async def make_auth_request(
-    client: AsyncClient,
+    client: AuthApiClient,
     endpoint: str,
     payload: Dict
 ) -> Dict:
     """Общая функция для авторизационных запросов"""
     try:
-        response = await client.post(endpoint, json=payload)
-        response.raise_for_status()
-        return response.json()
-    except httpx.HTTPStatusError as e:
+        response = await client.post(endpoint, payload)
+    except AuthApiUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Auth API is unavailable",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    if response.is_error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Auth API error: {e.response.text}"
+            detail=f"Auth API error: {response.text}"
         )
+    return response.json()
 
 @router.post(
     "/login",
@@ -59,7 +65,7 @@ async def make_auth_request(
 )
 async def login(
     request: LoginRequest,
-    client: AsyncClient = Depends(get_auth_client)
+    client: AuthApiClient = Depends(get_auth_client)
 ):
     """Отправляет данные для входа и инициирует отправку кода верификации"""
     payload = request.dict()
@@ -74,7 +80,7 @@ async def login(
 )
 async def verify(
     request: VerifyRequest,
-    client: AsyncClient = Depends(get_auth_client)
+    client: AuthApiClient = Depends(get_auth_client)
 ):
     """Проверяет код верификации и возвращает токены доступа"""
     payload = request.dict()
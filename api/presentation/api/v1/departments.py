@@ -6,6 +6,9 @@ from pydantic import BaseModel
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import Department
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.reference_cache import (
+    DEPARTMENTS, ReferenceCache, get_reference_cache, invalidate_reference_data
+)
 
 router = APIRouter()
 
@@ -47,16 +50,13 @@ class DepartmentResponse(DepartmentBase):
 async def get_departments(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, le=1000, description="Maximum number of records to return"),
-    session: AsyncSession = Depends(get_async_session),
+    cache: ReferenceCache = Depends(get_reference_cache),
 ):
     """
     Get list of departments with pagination.
     """
-    result = await session.execute(
-        select(Department).offset(skip).limit(limit)
-    )
-    departments = result.scalars().all()
-    return departments
+    departments = await cache.get(DEPARTMENTS)
+    return departments[skip:skip + limit]
 
 @router.get("/departments/{department_id}", response_model=DepartmentResponse)
 async def get_department(
@@ -89,6 +89,7 @@ async def create_department(
     """
     db_department = Department(**department.dict())
     session.add(db_department)
+    await invalidate_reference_data(session, DEPARTMENTS)
     await session.commit()
     await session.refresh(db_department)
     return db_department
@@ -117,6 +118,7 @@ async def update_department(
         setattr(db_department, key, value)
     
     session.add(db_department)
+    await invalidate_reference_data(session, DEPARTMENTS)
     await session.commit()
     await session.refresh(db_department)
     return db_department
@@ -141,5 +143,6 @@ async def delete_department(
         )
     
     await session.delete(department)
+    await invalidate_reference_data(session, DEPARTMENTS)
     await session.commit()
     return None
\ No newline at end of file
@@ -3,11 +3,12 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select
 from pydantic import BaseModel, Field
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import DepartmentsMetrics
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.responses import rows_to_dicts, trusted_response
 
 router = APIRouter()
 
@@ -59,6 +60,12 @@ class DepartmentsMetricsResponse(DepartmentsMetricsBase):
             }
         }
 
+# Поля DepartmentsMetricsResponse
+DEPARTMENTS_METRICS_FIELDS = (
+    "id", "department_id", "metrics_id", "value", "year", "quarter",
+    "period_date", "author_id", "status",
+)
+
 # Endpoints
 @router.get("/departments-metrics", response_model=List[DepartmentsMetricsResponse])
 async def get_departments_metrics(
@@ -73,7 +80,9 @@ async def get_departments_metrics(
     """
     Get list of department metrics with optional filtering.
     """
-    query = select(DepartmentsMetrics)
+    query = select(
+        *(getattr(DepartmentsMetrics, field) for field in DEPARTMENTS_METRICS_FIELDS)
+    )
     
     if department_id:
         query = query.where(DepartmentsMetrics.department_id == department_id)
@@ -87,8 +96,7 @@ async def get_departments_metrics(
     result = await session.execute(
         query.offset(skip).limit(limit)
     )
-    metrics = result.scalars().all()
-    return metrics
+    return trusted_response(rows_to_dicts(result))
 
 @router.get("/departments-metrics/{record_id}", response_model=DepartmentsMetricsResponse)
 async def get_department_metric(
@@ -120,14 +128,6 @@ async def create_department_metric(
     Create a new department metric record.
     """
     db_metric = DepartmentsMetrics(**metric.dict())
-    
-    # Generate new ID
-    result = await session.execute(
-        select(DepartmentsMetrics).order_by(desc(DepartmentsMetrics.id)).limit(1)
-    )
-    last_record = result.scalar_one_or_none()
-    db_metric.id = (last_record.id + 1) if last_record else 1
-    
     session.add(db_metric)
     await session.commit()
     await session.refresh(db_metric)
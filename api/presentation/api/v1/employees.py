@@ -50,6 +50,7 @@ from pydantic import BaseModel
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import Employee
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.responses import rows_to_dicts, trusted_response
 
 class EmployeeResponse(BaseModel):
     employee_id: int
@@ -85,21 +86,8 @@ async def get_employees(
             Employee.role_id
         ).offset(skip).limit(limit)
     )
-    # Явно преобразуем результат в словари
-    employees = [
-        {
-            "employee_id": emp.employee_id,
-            "first_name": emp.first_name,
-            "last_name": emp.last_name,
-            "surname": emp.surname,
-            "mail_box": emp.mail_box,
-            "number_phone": emp.number_phone,
-            "role_id": emp.role_id
-        }
-        for emp in result.all()
-    ]
-    
-    return employees
+    # Колонки запроса совпадают с полями EmployeeResponse
+    return trusted_response(rows_to_dicts(result))
 
 @router.get("/employees/{employee_id}", response_model=EmployeeResponse)
 async def get_employee(
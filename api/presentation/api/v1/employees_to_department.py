@@ -1,9 +1,10 @@
 from sqlalchemy import select, case, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
-from fastapi import HTTPException, Depends, APIRouter
+from fastapi import HTTPException, Depends, APIRouter, Query, Request
 from pydantic import BaseModel, Field
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.streaming import StreamFormat, stream_rows
 from api.infrastructure.storage.sqlalchemy.models.asos_models import (
     ActualWorkingDaysOnEmployee,
     Employee,
@@ -13,17 +14,44 @@ from api.infrastructure.storage.sqlalchemy.models.asos_models import (
 from typing import List, Dict
 
 router = APIRouter()
+
+DEPARTMENT_HEAD_FIELDS = (
+    "department", "faculty", "month", "year",
+    "head_name", "position", "working_days",
+)
+
+
+def department_head_to_dict(row) -> Dict:
+    return {
+        "department": row.department_name,
+        "faculty": row.faculty_name,
+        "month": row.month_name,
+        "year": row.year,
+        "head_name": row.full_name,
+        "position": row.jobtitle,
+        "working_days": row.count_day
+    }
+
+
 @router.get(
     path="/employees-to-departments/",
     status_code=status.HTTP_200_OK
 )
 async def get_department_heads_info(
+    request: Request,
+    output_format: StreamFormat = Query(
+        "json",
+        alias="format",
+        description="json — единый массив; ndjson/csv — потоковая выгрузка"
+    ),
     session: AsyncSession = Depends(get_async_session)
 ) -> List[Dict]:
     """
     Получает полную информацию о заведующих кафедрами по месяцам
     
     Args:
+        output_format: json (по умолчанию), ndjson или csv; последние два
+            отдаются потоком через серверный курсор
         session: асинхронная сессия SQLAlchemy
         
     Returns:
@@ -76,18 +104,17 @@ async def get_department_heads_info(
         )
     )
     
+    if output_format != "json":
+        return stream_rows(
+            request,
+            query,
+            output_format,
+            to_record=department_head_to_dict,
+            csv_fields=list(DEPARTMENT_HEAD_FIELDS),
+            filename="employees_to_departments",
+        )
+
     result = await session.execute(query)
     rows = result.all()
     
-    return [
-        {
-            "department": row.department_name,
-            "faculty": row.faculty_name,
-            "month": row.month_name,
-            "year": row.year,
-            "head_name": row.full_name,
-            "position": row.jobtitle,
-            "working_days": row.count_day
-        }
-        for row in rows
-    ]
\ No newline at end of file
+    return [department_head_to_dict(row) for row in rows]
\ No newline at end of file
@@ -4,7 +4,7 @@ from fastapi import HTTPException, Depends, APIRouter
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
-from sqlalchemy import select, desc
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
@@ -106,11 +106,6 @@ async def create_employee_to_metric(
         session: AsyncSession = Depends(get_async_session)
 ):
     db_record = EmployeesToMetrics(**record.dict())
-    result = await session.execute(
-        select(EmployeesToMetrics).order_by(desc(EmployeesToMetrics.id)).limit(1)
-    )
-    id_gen = result.scalar_one_or_none()
-    db_record.id = id_gen.id + 1
     session.add(db_record)
     await session.commit()
     await session.refresh(db_record)
@@ -1,8 +1,9 @@
-from fastapi import HTTPException, Depends, APIRouter, status
+from fastapi import HTTPException, Depends, APIRouter, Query, Request, status
 from pydantic import BaseModel
-from typing import List, Dict, Tuple
+from typing import List, Optional, Tuple
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import (
@@ -10,6 +11,8 @@ from api.infrastructure.storage.sqlalchemy.models.asos_models import (
     ActualWorkingDaysOnEmployee,
 )
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.responses import trusted_response
+from api.presentation.api.v1.streaming import StreamFormat, stream_rows
 
 # Pydantic schemas
 class MetricScore(BaseModel):
@@ -31,56 +34,127 @@ class EmployeesMetricsResponse(EmployeesMetricsBase):
 
 router = APIRouter()
 
-@router.get(
-    "/employees_metrics/",
-    response_model=List[EmployeesMetricsResponse],
-    status_code=status.HTTP_200_OK
-)
-async def read_employees_metrics(
-    skip: int = 0,
-    limit: int = 100,
-    session: AsyncSession = Depends(get_async_session)
-):
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def build_grouped_metrics_query(*filters):
     """
-    Retrieve, paginated, for each (employee, year, quarter) the list of metric‐score pairs
-    based on ActualWorkingDaysOnEmployee → DepartmentsMetrics join.
+    (employee, year, quarter) groups with their metric ids and scores
+    aggregated in Postgres, ordered by the group key.
+
+    Months of ActualWorkingDaysOnEmployee are collapsed first, so every
+    department metric appears once per group.
     """
-    stmt = (
+    employee_quarters = (
         select(
             ActualWorkingDaysOnEmployee.employee_id,
+            ActualWorkingDaysOnEmployee.department_id,
             ActualWorkingDaysOnEmployee.year,
-            ActualWorkingDaysOnEmployee.quarter,
-            DepartmentsMetrics.metrics_id,
-            DepartmentsMetrics.value
+            ActualWorkingDaysOnEmployee.quarter
+        )
+        .where(*filters)
+        .distinct()
+        .subquery("employee_quarters")
+    )
+    group_key = (
+        employee_quarters.c.employee_id,
+        employee_quarters.c.year,
+        employee_quarters.c.quarter
+    )
+    query = (
+        select(
+            *group_key,
+            func.array_agg(
+                aggregate_order_by(
+                    DepartmentsMetrics.metrics_id, DepartmentsMetrics.id
+                )
+            ).label("metrics_ids"),
+            func.array_agg(
+                aggregate_order_by(
+                    DepartmentsMetrics.value, DepartmentsMetrics.id
+                )
+            ).label("scores")
         )
         .join(
             DepartmentsMetrics,
             and_(
-                DepartmentsMetrics.department_id == ActualWorkingDaysOnEmployee.department_id,
-                DepartmentsMetrics.year == ActualWorkingDaysOnEmployee.year,
-                DepartmentsMetrics.quarter == ActualWorkingDaysOnEmployee.quarter
+                DepartmentsMetrics.department_id == employee_quarters.c.department_id,
+                DepartmentsMetrics.year == employee_quarters.c.year,
+                DepartmentsMetrics.quarter == employee_quarters.c.quarter
             )
         )
-        .offset(0)  # fetch all rows, grouping comes next
+        .group_by(*group_key)
+        .order_by(*group_key)
     )
-    result = await session.execute(stmt)
-    rows = result.all()
+    return query
+
+
+def group_to_response(row) -> dict:
+    return {
+        "employee_id": row.employee_id,
+        "year": row.year,
+        "quarter": row.quarter,
+        "metrics": [
+            {"metrics_id": m_id, "score": score}
+            for m_id, score in zip(row.metrics_ids, row.scores)
+        ],
+    }
+
+
+def parse_cursor(cursor: str) -> Tuple[int, int, int]:
+    try:
+        employee_id, year, quarter = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor must be 'employee_id:year:quarter'"
+        )
+    return employee_id, year, quarter
 
-    # Group by (employee_id, year, quarter)
-    grouped: Dict[Tuple[int,int,int], List[MetricScore]] = {}
-    for emp_id, yr, qt, m_id, score in rows:
-        key = (emp_id, yr, qt)
-        grouped.setdefault(key, []).append(MetricScore(metrics_id=m_id, score=score))
 
-    # paginate the groups
-    items = list(grouped.items())[skip: skip + limit]
+@router.get(
+    "/employees_metrics/",
+    response_model=List[EmployeesMetricsResponse],
+    status_code=status.HTTP_200_OK
+)
+async def read_employees_metrics(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None,
+        description="Ключ последней группы предыдущей страницы "
+                    "'employee_id:year:quarter' (значение заголовка X-Next-Cursor)"
+    ),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Retrieve, paginated, for each (employee, year, quarter) the list of metric‐score pairs
+    based on ActualWorkingDaysOnEmployee → DepartmentsMetrics join.
 
-    return [
-        EmployeesMetricsResponse(
-            employee_id=emp, year=yr, quarter=qt, metrics=ms_list
+    Groups are built in Postgres and paginated by a keyset cursor on
+    (employee_id, year, quarter); the cursor of the next page is returned
+    in the X-Next-Cursor header.
+    """
+    filters = []
+    if cursor is not None:
+        filters.append(
+            tuple_(
+                ActualWorkingDaysOnEmployee.employee_id,
+                ActualWorkingDaysOnEmployee.year,
+                ActualWorkingDaysOnEmployee.quarter
+            ) > tuple_(*parse_cursor(cursor))
         )
-        for (emp, yr, qt), ms_list in items
-    ]
+    stmt = build_grouped_metrics_query(*filters)
+    result = await session.execute(stmt.offset(skip).limit(limit))
+    rows = result.all()
+
+    headers = {}
+    if len(rows) == limit:
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = f"{last.employee_id}:{last.year}:{last.quarter}"
+        headers["Access-Control-Expose-Headers"] = NEXT_CURSOR_HEADER
+
+    return trusted_response([group_to_response(row) for row in rows], headers=headers)
 
 
 @router.get(
@@ -89,42 +163,36 @@ async def read_employees_metrics(
     status_code=status.HTTP_200_OK
 )
 async def read_all_employees_metrics(
+    request: Request,
+    output_format: StreamFormat = Query(
+        "json",
+        alias="format",
+        description="json — единый массив; ndjson/csv — потоковая выгрузка"
+    ),
     session: AsyncSession = Depends(get_async_session)
 ):
     """
     Retrieve for each (employee, year, quarter) the full list of metric‐score pairs.
+
+    With format=ndjson or format=csv the rows are streamed from a
+    server-side cursor; CSV has one line per metric score.
     """
-    stmt = (
-        select(
-            ActualWorkingDaysOnEmployee.employee_id,
-            ActualWorkingDaysOnEmployee.year,
-            ActualWorkingDaysOnEmployee.quarter,
-            DepartmentsMetrics.metrics_id,
-            DepartmentsMetrics.value
+    stmt = build_grouped_metrics_query()
+    if output_format != "json":
+        return stream_rows(
+            request,
+            stmt,
+            output_format,
+            to_record=group_to_response,
+            csv_fields=["employee_id", "year", "quarter", "metrics_id", "score"],
+            to_csv_rows=lambda row: [
+                [row.employee_id, row.year, row.quarter, m_id, score]
+                for m_id, score in zip(row.metrics_ids, row.scores)
+            ],
+            filename="employees_metrics",
         )
-        .join(
-            DepartmentsMetrics,
-            and_(
-                DepartmentsMetrics.department_id == ActualWorkingDaysOnEmployee.department_id,
-                DepartmentsMetrics.year == ActualWorkingDaysOnEmployee.year,
-                DepartmentsMetrics.quarter == ActualWorkingDaysOnEmployee.quarter
-            )
-        )
-    )
     result = await session.execute(stmt)
-    rows = result.all()
-
-    grouped: Dict[Tuple[int,int,int], List[MetricScore]] = {}
-    for emp_id, yr, qt, m_id, score in rows:
-        key = (emp_id, yr, qt)
-        grouped.setdefault(key, []).append(MetricScore(metrics_id=m_id, score=score))
-
-    return [
-        EmployeesMetricsResponse(
-            employee_id=emp, year=yr, quarter=qt, metrics=ms_list
-        )
-        for (emp, yr, qt), ms_list in grouped.items()
-    ]
+    return trusted_response([group_to_response(row) for row in result])
 
 
 @router.get(
@@ -139,23 +207,8 @@ async def read_employee_metrics(
     """
     Retrieve all (year, quarter) metric‐score lists for a specific employee.
     """
-    stmt = (
-        select(
-            ActualWorkingDaysOnEmployee.employee_id,
-            ActualWorkingDaysOnEmployee.year,
-            ActualWorkingDaysOnEmployee.quarter,
-            DepartmentsMetrics.metrics_id,
-            DepartmentsMetrics.value
-        )
-        .where(ActualWorkingDaysOnEmployee.employee_id == employee_id)
-        .join(
-            DepartmentsMetrics,
-            and_(
-                DepartmentsMetrics.department_id == ActualWorkingDaysOnEmployee.department_id,
-                DepartmentsMetrics.year == ActualWorkingDaysOnEmployee.year,
-                DepartmentsMetrics.quarter == ActualWorkingDaysOnEmployee.quarter
-            )
-        )
+    stmt = build_grouped_metrics_query(
+        ActualWorkingDaysOnEmployee.employee_id == employee_id
     )
     result = await session.execute(stmt)
     rows = result.all()
@@ -163,14 +216,4 @@ async def read_employee_metrics(
     if not rows:
         raise HTTPException(status_code=404, detail="Employee metrics not found")
 
-    grouped: Dict[Tuple[int,int,int], List[MetricScore]] = {}
-    for emp_id, yr, qt, m_id, score in rows:
-        key = (emp_id, yr, qt)
-        grouped.setdefault(key, []).append(MetricScore(metrics_id=m_id, score=score))
-
-    return [
-        EmployeesMetricsResponse(
-            employee_id=emp, year=yr, quarter=qt, metrics=ms_list
-        )
-        for (emp, yr, qt), ms_list in grouped.items()
-    ]
+    return trusted_response([group_to_response(row) for row in rows])
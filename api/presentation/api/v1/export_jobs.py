@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from api.infrastructure.storage.sqlalchemy.models.asos_models import ExportJob
+from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.table_maker import EXPORT_KINDS
+from api.presentation.api.v1.table_maker_3.export_pool import ExportPoolBusy
+from api.presentation.api.v1.table_maker_3.workbook_output import XLSX_MEDIA_TYPE
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = (PENDING, RUNNING)
+# Условие частичного уникального индекса uq_export_jobs_active_dedup_key;
+# для ON CONFLICT оно должно совпадать с индексом буквально
+ACTIVE_PREDICATE = text("status IN ('pending', 'running')")
+
+MAX_ATTEMPTS = 3
+
+
+class ExportJobRequest(BaseModel):
+    kind: Literal["metrics", "experts"]
+
+
+def job_to_dict(job: ExportJob) -> dict:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+async def get_job_or_404(session: AsyncSession, job_id: int) -> ExportJob:
+    job = await session.get(ExportJob, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    return job
+
+
+@router.post(
+    path="/",
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_export_job(
+    data: ExportJobRequest,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Ставит выгрузку в очередь. Если такая же выгрузка уже ждет или
+    выполняется, возвращается ее задание.
+    """
+    dedup_key = data.kind
+    for _ in range(2):
+        job_id = (await session.execute(
+            insert(ExportJob)
+            .values(kind=data.kind, dedup_key=dedup_key)
+            .on_conflict_do_nothing(
+                index_elements=[ExportJob.dedup_key],
+                index_where=ACTIVE_PREDICATE,
+            )
+            .returning(ExportJob.id)
+        )).scalar_one_or_none()
+        if job_id is None:
+            job_id = (await session.execute(
+                select(ExportJob.id).where(
+                    ExportJob.dedup_key == dedup_key,
+                    ExportJob.status.in_(ACTIVE_STATUSES),
+                )
+            )).scalar_one_or_none()
+        # Между вставкой и выборкой активное задание могло завершиться
+        if job_id is not None:
+            break
+    await session.commit()
+
+    job = await get_job_or_404(session, job_id)
+    return {"status": "OK", "data": job_to_dict(job)}
+
+
+@router.get(
+    path="/{job_id}",
+    status_code=status.HTTP_200_OK,
+)
+async def get_export_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_async_session)
+):
+    job = await get_job_or_404(session, job_id)
+    return {"status": "OK", "data": job_to_dict(job)}
+
+
+@router.get(
+    path="/{job_id}/download",
+    status_code=status.HTTP_200_OK,
+)
+async def download_export_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_async_session)
+):
+    job = await get_job_or_404(session, job_id)
+    if job.status != DONE or not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export job is {job.status}"
+        )
+    headers = {'Access-Control-Expose-Headers': 'Content-Disposition'}
+    return FileResponse(
+        job.result_path,
+        filename=EXPORT_KINDS[job.kind].filename,
+        media_type=XLSX_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+class ExportJobWorker:
+    """
+    Обработчик очереди заданий выгрузки внутри процесса приложения.
+
+    Задания забираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    обработчики всех воркеров gunicorn делят одну очередь без двойной
+    обработки. Задание в статусе running, которое не обновлялось
+    stale_after секунд (воркер упал), забирается снова, но не больше
+    MAX_ATTEMPTS раз. Пока задание ждет пула или строится, обработчик
+    обновляет updated_at каждые stale_after / 3 секунд; обновления
+    задания проверяют номер попытки, поэтому попытка, у которой задание
+    уже забрали, ничего не перезаписывает. Книга строится в пуле выгрузок
+    приложения, результат сохраняется в results_dir.
+    """
+
+    def __init__(
+            self,
+            app: FastAPI,
+            poll_interval: float,
+            stale_after: int,
+            ttl: int,
+            results_dir: str,
+    ):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.stale_after = timedelta(seconds=stale_after)
+        self.ttl = timedelta(seconds=ttl)
+        self.results_dir = Path(results_dir)
+        self._last_cleanup = 0.0
+
+    @property
+    def _session_factory(self):
+        return self.app.state.sa_session_factory
+
+    async def run(self):
+        while True:
+            try:
+                job = await self._claim()
+                if job is None:
+                    await self._cleanup()
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self._process(*job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Export job worker iteration failed")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim(self) -> Optional[tuple]:
+        async with self._session_factory() as session:
+            query = (
+                select(ExportJob)
+                .where(or_(
+                    ExportJob.status == PENDING,
+                    and_(
+                        ExportJob.status == RUNNING,
+                        ExportJob.updated_at < func.now() - self.stale_after,
+                    ),
+                ))
+                .order_by(ExportJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = (await session.execute(query)).scalar_one_or_none()
+            if job is None:
+                return None
+
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = FAILED
+                job.error = "Export job exceeded the number of attempts"
+                job.finished_at = func.now()
+                job.updated_at = func.now()
+                await session.commit()
+                return None
+
+            job.status = RUNNING
+            job.progress = 0
+            job.attempts += 1
+            job.updated_at = func.now()
+            job_id, kind, attempt = job.id, job.kind, job.attempts
+            await session.commit()
+            return job_id, kind, attempt
+
+    async def _update(self, job_id: int, attempt: int, **values) -> bool:
+        """Обновляет задание, если оно все еще принадлежит попытке attempt"""
+        async with self._session_factory() as session:
+            result = await session.execute(
+                update(ExportJob)
+                .where(
+                    ExportJob.id == job_id,
+                    ExportJob.attempts == attempt,
+                    ExportJob.status == RUNNING,
+                )
+                .values(updated_at=func.now(), **values)
+            )
+            await session.commit()
+            return result.rowcount > 0
+
+    async def _heartbeat(self, job_id: int, attempt: int):
+        interval = self.stale_after.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._update(job_id, attempt)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Export job %s heartbeat failed", job_id)
+
+    async def _render(self, render, *args):
+        # Очередь пула общая с синхронными выгрузками: если она заполнена,
+        # задание ждет, а не завершается ошибкой
+        while True:
+            try:
+                return await self.app.state.export_pool.render(render, *args)
+            except ExportPoolBusy:
+                await asyncio.sleep(self.poll_interval)
+
+    def _save(self, job_id: int, attempt: int, buffer) -> str:
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        target = self.results_dir / f"{job_id}-{attempt}.xlsx"
+        fd, tmp_name = tempfile.mkstemp(dir=self.results_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(buffer, tmp)
+            os.replace(tmp_name, target)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        finally:
+            buffer.close()
+        return str(target)
+
+    async def _process(self, job_id: int, kind: str, attempt: int):
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, attempt))
+        try:
+            export = EXPORT_KINDS[kind]
+            async with self._session_factory() as session:
+                args = await export.load(session, self.app.state.reference_cache)
+            await self._update(job_id, attempt, progress=30)
+
+            buffer = await self._render(export.render, *args)
+            await self._update(job_id, attempt, progress=80)
+
+            result_path = await run_in_threadpool(self._save, job_id, attempt, buffer)
+            finished = await self._update(
+                job_id, attempt, status=DONE, progress=100,
+                result_path=result_path, finished_at=func.now(),
+            )
+            if not finished:
+                logger.warning(
+                    "Export job %s attempt %s was superseded", job_id, attempt
+                )
+                await run_in_threadpool(Path(result_path).unlink, missing_ok=True)
+        except asyncio.CancelledError:
+            # Остановка приложения: задание заберут после stale_after
+            raise
+        except Exception as exc:
+            logger.exception("Export job %s failed", job_id)
+            await self._update(
+                job_id, attempt,
+                status=FAILED, error=str(exc), finished_at=func.now(),
+            )
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _cleanup(self):
+        """Удаляет завершенные задания старше ttl вместе с файлами"""
+        now = time.monotonic()
+        if now - self._last_cleanup < self.ttl.total_seconds() / 24:
+            return
+        self._last_cleanup = now
+
+        async with self._session_factory() as session:
+            result = await session.execute(
+                delete(ExportJob)
+                .where(
+                    ExportJob.status.in_((DONE, FAILED)),
+                    ExportJob.finished_at < func.now() - self.ttl,
+                )
+                .returning(ExportJob.result_path)
+            )
+            paths = [path for path in result.scalars() if path]
+            await session.commit()
+
+        def unlink_all():
+            for path in paths:
+                Path(path).unlink(missing_ok=True)
+
+        await run_in_threadpool(unlink_all)
@@ -8,6 +8,9 @@ from starlette import status
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import FacultyAndInstitute, Department
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.reference_cache import (
+    DEPARTMENTS, FACULTIES, ReferenceCache, get_reference_cache, invalidate_reference_data
+)
 
 # Pydantic схемы
 class FacultyAndInstituteBase(BaseModel):
@@ -46,12 +49,10 @@ router = APIRouter()
 async def read_faculties(
         skip: int = 0,
         limit: int = 100,
-        session: AsyncSession = Depends(get_async_session)
+        cache: ReferenceCache = Depends(get_reference_cache)
 ):
-    result = await session.execute(
-        select(FacultyAndInstitute).offset(skip).limit(limit)
-    )
-    return result.scalars().all()
+    faculties = await cache.get(FACULTIES)
+    return faculties[skip:skip + limit]
 
 @router.get(
     path="/faculties/{faculty_id}",
@@ -81,6 +82,7 @@ async def create_faculty(
 ):
     db_faculty = FacultyAndInstitute(**faculty.dict())
     session.add(db_faculty)
+    await invalidate_reference_data(session, FACULTIES)
     await session.commit()
     await session.refresh(db_faculty)
     return db_faculty
@@ -106,6 +108,7 @@ async def update_faculty(
         setattr(db_faculty, key, value)
 
     session.add(db_faculty)
+    await invalidate_reference_data(session, FACULTIES)
     await session.commit()
     await session.refresh(db_faculty)
     return db_faculty
@@ -126,6 +129,7 @@ async def delete_faculty(
         raise HTTPException(status_code=404, detail="Faculty not found")
 
     await session.delete(faculty)
+    await invalidate_reference_data(session, FACULTIES)
     await session.commit()
     return {"message": "Faculty deleted successfully"}
 
@@ -138,12 +142,10 @@ async def delete_faculty(
 async def read_departments(
         skip: int = 0,
         limit: int = 100,
-        session: AsyncSession = Depends(get_async_session)
+        cache: ReferenceCache = Depends(get_reference_cache)
 ):
-    result = await session.execute(
-        select(Department).offset(skip).limit(limit)
-    )
-    return result.scalars().all()
+    departments = await cache.get(DEPARTMENTS)
+    return departments[skip:skip + limit]
 
 @router.get(
     path="/departments/{department_id}",
@@ -173,6 +175,7 @@ async def create_department(
 ):
     db_department = Department(**department.dict())
     session.add(db_department)
+    await invalidate_reference_data(session, DEPARTMENTS)
     await session.commit()
     await session.refresh(db_department)
     return db_department
@@ -198,6 +201,7 @@ async def update_department(
         setattr(db_department, key, value)
 
     session.add(db_department)
+    await invalidate_reference_data(session, DEPARTMENTS)
     await session.commit()
     await session.refresh(db_department)
     return db_department
@@ -218,5 +222,6 @@ async def delete_department(
         raise HTTPException(status_code=404, detail="Department not found")
 
     await session.delete(department)
+    await invalidate_reference_data(session, DEPARTMENTS)
     await session.commit()
     return {"message": "Department deleted successfully"}
\ No newline at end of file
@@ -1,5 +1,8 @@
-from http.client import HTTPException
+from typing import List
+
+from pydantic import BaseModel
 from sqlalchemy import select, any_, func, literal_column, true, and_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 from starlette import status
@@ -7,13 +10,23 @@ from starlette import status
 from api.infrastructure.storage.sqlalchemy.models.asos_models import Department, DepartmentsMetrics, Employee, \
     MetricDescription, EmployeesToMetrics
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
-from fastapi import APIRouter, Body, Response, Depends, Query
+from fastapi import APIRouter, Body, Response, Depends, Query, HTTPException
 from fastapi.responses import FileResponse
 from passlib.context import CryptContext
 from datetime import date
 from sqlalchemy import select
 
 
+class KpiCellRef(BaseModel):
+    id: int
+
+
+class KpiCell(BaseModel):
+    department: KpiCellRef
+    metric: KpiCellRef
+    score: int
+
+
 router = APIRouter()
 
 @router.get(
@@ -112,6 +125,11 @@ async def create_or_update_department_metric(
         employee_id: int = Query(..., description="ID сотрудника"),
         session: AsyncSession = Depends(get_async_session),
 ):
+    """
+    Сохраняет одну ячейку таблицы KPI. period_date — дата последнего
+    сохранения ячейки, она обновляется и при изменении значения, как в
+    /table/batch; сводная таблица берет последнее значение по ней.
+    """
     try:
         # 1. Извлечение данных из входного объекта
         department_data = data.get("department", {})
@@ -154,8 +172,9 @@ async def create_or_update_department_metric(
         existing: DepartmentsMetrics | None = result.scalar_one_or_none()
 
         if existing:
-            # 5a. Обновляем значение
+            # 5a. Обновляем значение и дату сохранения
             existing.value = score
+            existing.period_date = date.today()
             await session.commit()
             await session.refresh(existing)
             return {
@@ -202,4 +221,96 @@ async def create_or_update_department_metric(
         raise  # Пробрасываем уже обработанные ошибки
     except Exception as e:
         await session.rollback()
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post(
+    path="/table/batch",
+    status_code=status.HTTP_200_OK,
+)
+async def upsert_department_metrics(
+        cells: List[KpiCell],
+        year: int = Query(..., description="Год"),
+        quarter: int = Query(..., description="Квартал"),
+        employee_id: int = Query(..., description="ID сотрудника"),
+        session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Сохраняет сразу много ячеек таблицы KPI одного автора за квартал
+    одним INSERT ... ON CONFLICT DO UPDATE по натуральному ключу
+    (department_id, metrics_id, author_id, year, quarter).
+    period_date — дата последнего сохранения ячейки, как и в /table.
+    """
+    if not cells:
+        return {"status": "OK", "data": []}
+
+    # Одна и та же ячейка может прийти несколько раз — берем последнее значение
+    scores = {(cell.department.id, cell.metric.id): cell.score for cell in cells}
+    dept_ids = {dept_id for dept_id, _ in scores}
+    metric_ids = {metric_id for _, metric_id in scores}
+
+    # 1. Проверка существования сущностей — по одному запросу на таблицу
+    result = await session.execute(select(Department.id).where(Department.id.in_(dept_ids)))
+    missing = dept_ids - set(result.scalars())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Departments with ids {sorted(missing)} not found")
+
+    result = await session.execute(select(MetricDescription.metric_id).where(MetricDescription.metric_id.in_(metric_ids)))
+    missing = metric_ids - set(result.scalars())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Metrics with ids {sorted(missing)} not found")
+
+    result = await session.execute(select(Employee.employee_id).where(Employee.employee_id == employee_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail=f"Employee with id {employee_id} not found")
+
+    # 2. Запись всех ячеек одним запросом
+    today = date.today()
+    stmt = insert(DepartmentsMetrics).values([
+        {
+            "department_id": dept_id,
+            "metrics_id": metric_id,
+            "value": score,
+            "year": year,
+            "quarter": quarter,
+            "period_date": today,
+            "author_id": employee_id,
+            "status": 1,  # Статус "активно"
+        }
+        for (dept_id, metric_id), score in scores.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_departments_metrics_natural_key",
+        set_={
+            "value": stmt.excluded.value,
+            "period_date": stmt.excluded.period_date,
+        },
+    ).returning(
+        DepartmentsMetrics.id,
+        DepartmentsMetrics.department_id,
+        DepartmentsMetrics.metrics_id,
+        DepartmentsMetrics.value,
+    )
+
+    try:
+        result = await session.execute(stmt)
+        rows = result.all()
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    return {
+        "status": "OK",
+        "year": year,
+        "quarter": quarter,
+        "data": [
+            {
+                "id": row.id,
+                "department_id": row.department_id,
+                "metric_id": row.metrics_id,
+                "value": row.value,
+            }
+            for row in rows
+        ],
+    }
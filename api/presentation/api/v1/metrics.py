@@ -1,15 +1,24 @@
+import asyncio
+import logging
+
 from fastapi import HTTPException, Depends, APIRouter
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 
-from sqlalchemy import nulls_last, update, insert, select
+from sqlalchemy import Date, cast, delete, exists, func, literal_column, nulls_last, union_all, update, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from api.infrastructure.storage.sqlalchemy.models.asos_models import Section, MetricDescription
+from api.infrastructure.storage.sqlalchemy.models.asos_models import Section, MetricDescription, \
+    MetricDescriptionHistory, DepartmentsMetrics
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.reference_cache import (
+    ACTIVE_METRICS, SECTIONS, ReferenceCache, get_reference_cache, invalidate_reference_data
+)
+from api.presentation.api.v1.responses import trusted_response
 
-from datetime import date
+from datetime import date, timedelta
 
 # Pydantic схемы
 class SectionBase(BaseModel):
@@ -101,6 +110,109 @@ class MetricDescriptionResponse(MetricDescriptionBase):
 
 router = APIRouter()
 
+# Поля версии метрики из запроса, остальные поля задаются при версионировании
+METRIC_VERSION_FIELDS = (
+    'metric_number', 'metric_subnumber', 'description',
+    'unit_of_measurement', 'base_level', 'average_level', 'goal_level',
+    'measurement_frequency', 'conditions', 'notes', 'points', 'section_id'
+)
+METRIC_RESPONSE_FIELDS = ('metric_id',) + METRIC_VERSION_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки: архивирование выполняет один воркер
+METRIC_ARCHIVE_LOCK_KEY = 0x6D657472
+
+
+def metric_valid_on(model, as_of: date):
+    """
+    Версия метрики действовала на дату as_of: date_start <= as_of < date_end
+    (date_end пустой у текущей версии). Выражение совпадает с GiST-индексами
+    ix_metric_descriptions_validity / ix_metric_descriptions_history_validity.
+    """
+    validity = func.daterange(model.date_start, model.date_end, literal_column("'[)'"))
+    return validity.op('@>')(cast(as_of, Date))
+
+
+async def read_metrics_as_of(session: AsyncSession, as_of: date, skip: int, limit: int):
+    versions = union_all(*(
+        select(*(getattr(model, field) for field in METRIC_RESPONSE_FIELDS))
+        .where(metric_valid_on(model, as_of))
+        for model in (MetricDescription, MetricDescriptionHistory)
+    )).subquery()
+    stmt = (
+        select(versions, Section.description.label("section_description"))
+        .join(Section, versions.c.section_id == Section.id)
+        .order_by(
+            versions.c.section_id.asc(),
+            versions.c.metric_number.asc(),
+            versions.c.metric_subnumber.asc()
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return metric_rows_to_response(result)
+
+
+def metric_rows_to_response(result) -> List[dict]:
+    """Строки METRIC_RESPONSE_FIELDS + section_description в форме ответа"""
+    return [
+        {
+            **{field: row[field] for field in METRIC_RESPONSE_FIELDS},
+            "section": {"description": row["section_description"]},
+        }
+        for row in result.mappings()
+    ]
+
+
+async def archive_metric_versions(session: AsyncSession, cutoff: date) -> int:
+    """
+    Переносит в metric_descriptions_history неактивные версии, закрытые
+    раньше cutoff. Версии, на которые ссылаются оценки departments_metrics,
+    остаются на месте. Возвращает число перенесенных версий.
+    """
+    columns = [column.name for column in MetricDescription.__table__.columns]
+    moved = (
+        delete(MetricDescription)
+        .where(
+            MetricDescription.is_active == False,
+            MetricDescription.date_end < cutoff,
+            ~exists().where(DepartmentsMetrics.metrics_id == MetricDescription.metric_id),
+        )
+        .returning(*MetricDescription.__table__.columns)
+        .cte("moved")
+    )
+    result = await session.execute(
+        insert(MetricDescriptionHistory)
+        .from_select(columns, select(*(moved.c[name] for name in columns)))
+        .returning(MetricDescriptionHistory.metric_id)
+    )
+    return len(result.all())
+
+
+async def run_metric_archive(session_factory, after_years: int, interval: float):
+    """
+    Периодически переносит версии метрик старше after_years лет в историю.
+    Запускается в каждом воркере, выполняется тем, кто взял блокировку.
+    """
+    while True:
+        try:
+            async with session_factory() as session:
+                locked = (await session.execute(
+                    select(func.pg_try_advisory_xact_lock(METRIC_ARCHIVE_LOCK_KEY))
+                )).scalar()
+                if locked:
+                    cutoff = date.today() - timedelta(days=365 * after_years)
+                    archived = await archive_metric_versions(session, cutoff)
+                    await session.commit()
+                    if archived:
+                        logger.info("Archived %s metric versions closed before %s", archived, cutoff)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Metric versions archive failed")
+        await asyncio.sleep(interval)
 
 
 # Section Endpoints
@@ -112,12 +224,10 @@ router = APIRouter()
 async def read_sections(
         skip: int = 0,
         limit: int = 100,
-        session: AsyncSession = Depends(get_async_session)
+        cache: ReferenceCache = Depends(get_reference_cache)
 ):
-    result = await session.execute(
-        select(Section).offset(skip).limit(limit)
-    )
-    return result.scalars().all()
+    sections = await cache.get(SECTIONS)
+    return sections[skip:skip + limit]
 
 
 @router.get(
@@ -149,6 +259,7 @@ async def create_section(
 ):
     db_section = Section(**section.dict())
     session.add(db_section)
+    await invalidate_reference_data(session, SECTIONS)
     await session.commit()
     await session.refresh(db_section)
     return db_section
@@ -175,6 +286,7 @@ async def update_section(
         setattr(db_section, key, value)
 
     session.add(db_section)
+    await invalidate_reference_data(session, SECTIONS)
     await session.commit()
     await session.refresh(db_section)
     return db_section
@@ -196,6 +308,7 @@ async def delete_section(
         raise HTTPException(status_code=404, detail="Section not found")
 
     await session.delete(section)
+    await invalidate_reference_data(session, SECTIONS)
     await session.commit()
     return {"message": "Section deleted successfully"}
 
@@ -209,12 +322,25 @@ async def delete_section(
 async def read_metrics(
         skip: int = 0,
         limit: int = 100,
+        as_of: Optional[date] = None,
         session: AsyncSession = Depends(get_async_session)
 ):
+    """
+    Активные метрики или, если передан as_of, версии метрик, действовавшие
+    на эту дату (включая перенесенные в историю).
+    """
     try:
-        # Получаем метрики вместе с секциями
+        if as_of is not None:
+            return trusted_response(
+                await read_metrics_as_of(session, as_of, skip, limit)
+            )
+
+        # Получаем поля ответа вместе с описанием секции, без ORM-объектов
         stmt = (
-            select(MetricDescription, Section.description.label("section_description"))
+            select(
+                *(getattr(MetricDescription, field) for field in METRIC_RESPONSE_FIELDS),
+                Section.description.label("section_description"),
+            )
             .join(Section, MetricDescription.section_id == Section.id).where(MetricDescription.is_active == True)
             .order_by(
                 MetricDescription.section_id.asc(),
@@ -226,18 +352,7 @@ async def read_metrics(
         )
         
         result = await session.execute(stmt)
-        
-        # Формируем ответ с включением информации о секции
-        metrics = []
-        for metric, section_desc in result:
-            metric_dict = metric.__dict__
-            # Удаляем внутренние атрибуты SQLAlchemy
-            metric_dict.pop('_sa_instance_state', None)
-            # Добавляем информацию о секции
-            metric_dict["section"] = {"description": section_desc}
-            metrics.append(metric_dict)
-            
-        return metrics
+        return trusted_response(metric_rows_to_response(result))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -274,6 +389,7 @@ async def create_metric(
 ):
     db_metric = MetricDescription(**metric.dict())
     session.add(db_metric)
+    await invalidate_reference_data(session, ACTIVE_METRICS)
     await session.commit()
     await session.refresh(db_metric)
     return db_metric
@@ -300,6 +416,7 @@ async def update_metric(
         setattr(db_metric, key, value)
 
     session.add(db_metric)
+    await invalidate_reference_data(session, ACTIVE_METRICS)
     await session.commit()
     await session.refresh(db_metric)
     return db_metric
@@ -321,6 +438,7 @@ async def delete_metric(
         raise HTTPException(status_code=404, detail="Metric not found")
 
     await session.delete(metric)
+    await invalidate_reference_data(session, ACTIVE_METRICS)
     await session.commit()
     return {"message": "Metric deleted successfully"}
 
@@ -332,98 +450,117 @@ async def update_metrics(
     data: List[Dict],
     session: AsyncSession = Depends(get_async_session)
 ):
+    """
+    Обновляет каталог метрик одним пакетом. Каждая метрика сравнивается
+    с текущей записью: новая версия (деактивация старой записи и вставка
+    новой) создается только для метрик, у которых изменились поля.
+    """
     current_date = date.today()
-    
-    METRIC_FIELDS = {
-        'metric_number', 'metric_subnumber', 'description',
-        'unit_of_measurement', 'base_level', 'average_level', 'goal_level',
-        'measurement_frequency', 'conditions', 'notes', 'points',
-        'section_id', 'date_start', 'date_end', 'is_active'
-    }
 
-    try:
-        for metric_data in data:
-            # 1. Обрабатываем раздел (section) если он есть в данных
-            if 'section' in metric_data:
-                section_data = metric_data['section']
-                section_id = metric_data.get('section_id')
-                
-                if not section_id:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Metric is missing 'section_id' field"
-                    )
-                
-                # Проверяем существование раздела
-                result = await session.execute(
-                    select(Section)
-                    .where(Section.id == section_id)
-                )
-                section = result.scalar_one_or_none()
-                
-                if section:
-                    # Обновляем описание раздела, если оно изменилось
-                    if section.description != section_data['description']:
-                        await session.execute(
-                            update(Section)
-                            .where(Section.id == section_id)
-                            .values(description=section_data['description'])
-                        )
-                else:
-                    # Создаем новый раздел (если вдруг не существует)
-                    await session.execute(
-                        insert(Section)
-                        .values(
-                            id=section_id,
-                            description=section_data['description']
-                        )
-                    )
-            
-            # 2. Обновляем метрику
-            old_metric_id = metric_data.get('metric_id')
-            
-            if not old_metric_id:
+    # 1. Проверяем данные до любых изменений
+    sections = {}
+    metrics = {}
+    for metric_data in data:
+        if 'section' in metric_data:
+            section_id = metric_data.get('section_id')
+            if not section_id:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Metric is missing 'metric_id' field"
+                    detail="Metric is missing 'section_id' field"
                 )
-            
-            # Деактивируем старую запись метрики
+            sections[section_id] = metric_data['section']['description']
+
+        old_metric_id = metric_data.get('metric_id')
+        if not old_metric_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Metric is missing 'metric_id' field"
+            )
+        # Повтор одной метрики в запросе: действует последнее значение
+        metrics[old_metric_id] = {
+            field: metric_data.get(field) for field in METRIC_VERSION_FIELDS
+        }
+
+    try:
+        # 2. Разделы: одна вставка с обновлением только изменившихся описаний
+        if sections:
+            stmt = insert(Section).values([
+                {"id": section_id, "description": description}
+                for section_id, description in sections.items()
+            ])
             await session.execute(
-                update(MetricDescription)
-                .where(MetricDescription.metric_id == old_metric_id)
-                .values(
-                    date_end=current_date,
-                    is_active=False
+                stmt.on_conflict_do_update(
+                    index_elements=[Section.id],
+                    set_={"description": stmt.excluded.description},
+                    where=Section.description.is_distinct_from(stmt.excluded.description),
                 )
             )
-            
-            # Создаем новую запись метрики
-            new_metric_data = {
-                k: v for k, v in metric_data.items() 
-                if k in METRIC_FIELDS  # Убрана проверка k != 'metric_id'
-            }
-            
-            # Убедимся, что metric_id не попадает в новые данные
-            new_metric_data.pop('metric_id', None)
-            
-            new_metric_data.update({
-                'date_start': current_date,
-                'is_active': True,
-                'date_end': None
-            })
-            
+
+        # 3. Текущие записи метрик одним запросом
+        result = await session.execute(
+            select(MetricDescription)
+            .where(MetricDescription.metric_id.in_(metrics))
+        )
+        current = {metric.metric_id: metric for metric in result.scalars()}
+
+        changed = [
+            old_metric_id
+            for old_metric_id, values in metrics.items()
+            if old_metric_id not in current
+            or not current[old_metric_id].is_active
+            or any(
+                getattr(current[old_metric_id], field) != value
+                for field, value in values.items()
+            )
+        ]
+
+        versions = []
+        if changed:
+            # 4. Деактивируем старые записи одним UPDATE
             await session.execute(
-                insert(MetricDescription)
-                .values(**new_metric_data)
+                update(MetricDescription)
+                .where(MetricDescription.metric_id.in_(changed))
+                .values(date_end=current_date, is_active=False)
             )
-        
+
+            # 5. Вставляем новые версии одним INSERT ... RETURNING
+            new_metric_ids = await session.scalars(
+                insert(MetricDescription).returning(
+                    MetricDescription.metric_id, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        **metrics[old_metric_id],
+                        'date_start': current_date,
+                        'date_end': None,
+                        'is_active': True,
+                    }
+                    for old_metric_id in changed
+                ]
+            )
+            versions = [
+                {"old_metric_id": old_metric_id, "metric_id": new_metric_id}
+                for old_metric_id, new_metric_id in zip(changed, new_metric_ids)
+            ]
+
+        if sections:
+            await invalidate_reference_data(session, SECTIONS)
+        if changed:
+            await invalidate_reference_data(session, ACTIVE_METRICS)
         await session.commit()
-        return {"status": "success", "message": "Metrics and sections updated successfully"}
+        return {
+            "status": "success",
+            "message": "Metrics and sections updated successfully",
+            "data": {
+                "updated": len(versions),
+                "unchanged": len(metrics) - len(versions),
+                "versions": versions,
+            }
+        }
     
     except Exception as e:
         await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        )
\ No newline at end of file
+        )
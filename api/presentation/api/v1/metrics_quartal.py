@@ -9,6 +9,9 @@ from starlette import status
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import MetricsInQuartal
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.reference_cache import (
+    METRICS_IN_QUARTAL, ReferenceCache, get_reference_cache, invalidate_reference_data
+)
 
 # Pydantic схемы
 class MetricsInQuartalBase(BaseModel):
@@ -35,15 +38,11 @@ router = APIRouter()
 async def read_metrics_quartals(
     skip: int = 0,
     limit: int = 100,
-    session: AsyncSession = Depends(get_async_session)
+    cache: ReferenceCache = Depends(get_reference_cache)
 ):
     try:
-        result = await session.execute(
-            select(MetricsInQuartal)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+        items = await cache.get(METRICS_IN_QUARTAL)
+        return items[skip:skip + limit]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -57,13 +56,12 @@ async def read_metrics_quartals(
 )
 async def read_metrics_quartal(
     quartal: int,
-    session: AsyncSession = Depends(get_async_session)
+    cache: ReferenceCache = Depends(get_reference_cache)
 ):
-    result = await session.execute(
-        select(MetricsInQuartal)
-        .where(MetricsInQuartal.quartal == quartal)
-    )
-    items = result.scalars().all()
+    items = [
+        item for item in await cache.get(METRICS_IN_QUARTAL)
+        if item.quartal == quartal
+    ]
     if not items:
         raise HTTPException(status_code=404, detail="Записи не найдены")
     return items
@@ -80,6 +78,7 @@ async def create_metrics_quartal(
     try:
         db_item = MetricsInQuartal(**data.dict())
         session.add(db_item)
+        await invalidate_reference_data(session, METRICS_IN_QUARTAL)
         await session.commit()
         await session.refresh(db_item)
         return db_item
@@ -113,6 +112,7 @@ async def update_metrics_quartal(
             setattr(db_item, key, value)
         
         session.add(db_item)
+        await invalidate_reference_data(session, METRICS_IN_QUARTAL)
         await session.commit()
         await session.refresh(db_item)
         return db_item
@@ -141,6 +141,7 @@ async def delete_metrics_quartal(
 
     try:
         await session.delete(item)
+        await invalidate_reference_data(session, METRICS_IN_QUARTAL)
         await session.commit()
         return {"message": "Запись успешно удалена"}
     except Exception as e:
@@ -1,19 +1,22 @@
 from fastapi import APIRouter, Depends, Response, Cookie, Request
-from sqlalchemy import select, insert, delete, update, or_, and_
+from sqlalchemy import select, insert, delete, update, func, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import (Employee, Role, FacultyAndInstitute,
                                                                       MetricsInQuartal,
                                                                       ActualWorkingDaysOnEmployee,
-                                                                      ActualWorkingDays, EmployeesToMetrics,
-                                                                      Department, MetricDescription)
+                                                                      ActualWorkingDays, EmployeesToMetrics)
 
 
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
 
 from api.infrastructure.storage.sqlalchemy.models.schemas import *
 from api.presentation.api.v1.dto.department import DepartmentResponse
+from api.presentation.api.v1.reference_cache import (
+    ACTIVE_METRICS, DEPARTMENTS, METRICS_IN_QUARTAL, ReferenceCache, get_reference_cache
+)
+from api.presentation.api.v1.working_days_index import absolute_quarter
 
 router = APIRouter(
 )
@@ -23,10 +26,8 @@ router = APIRouter(
     status_code=status.HTTP_200_OK,
     response_model=list[DepartmentResponse],  # Указываем модель ответа
 )
-async def get_department (sessions: AsyncSession = Depends(get_async_session)):
-    query = select(Department)
-    result = await sessions.execute(query)
-    list_departments = result.scalars().all()
+async def get_department (cache: ReferenceCache = Depends(get_reference_cache)):
+    list_departments = await cache.get(DEPARTMENTS)
 
     # Если данные отсутствуют
     if not list_departments:
@@ -46,72 +47,35 @@ async def get_department (sessions: AsyncSession = Depends(get_async_session)):
 )
 async def get_employees (quarter: int, id_choise_depart: int, year: int, sessions: AsyncSession = Depends(get_async_session)):
 
-    query = select(MetricsInQuartal).where(MetricsInQuartal.quartal == quarter)
+    query = select(MetricsInQuartal.duration).where(MetricsInQuartal.quartal == quarter).order_by(MetricsInQuartal.id).limit(1)
     result = await sessions.execute(query)
-    list_metrics = result.scalars().all()
+    durations = result.scalar_one_or_none()
 
-    if list_metrics == None:
+    if not durations:
         return {"status": "Empty metrics"}
 
-    metrics_id = list_metrics[0].metrics_id
-    durations = list_metrics[0].duration
-
-    max_duration = max(durations)
-
-    last_year = year - 1
-
-    min_quarter_last_year = 0
-    max_quarter_last_year = 0
-
-    min_quarter_this_year = 0
-    max_quarter_this_year = quarter - 1
-
-    if max_quarter_this_year == 0 :
-        max_quarter_last_year = 4
-        min_quarter_last_year = max(1, max_quarter_last_year - max_duration)
-
-    else:
-        min_quarter_this_year = max(1, max_quarter_this_year - max_duration)
-
-        if max_quarter_this_year - max_duration < 0:
-            max_quarter_last_year = 4
-            min_quarter_last_year = max(1, max_quarter_last_year - max_duration)
-
-    query = select(ActualWorkingDaysOnEmployee.employee_id).where(
-        ActualWorkingDaysOnEmployee.department_id == id_choise_depart
+    # Окно кварталов в сквозной нумерации (год * 4 + квартал - 1):
+    # предыдущий квартал и max(duration) кварталов перед ним
+    last_quarter = absolute_quarter(year, quarter) - 1
+    first_quarter = last_quarter - max(durations)
+
+    # Константы без параметров, чтобы выражение совпало с индексом
+    # ix_actual_working_days_on_employee_department_id_quarter_number
+    quarter_number = ActualWorkingDaysOnEmployee.year * literal_column("4") + ActualWorkingDaysOnEmployee.quarter - literal_column("1")
+    employees_in_window = select(ActualWorkingDaysOnEmployee.employee_id).where(
+        ActualWorkingDaysOnEmployee.department_id == id_choise_depart,
+        quarter_number.between(first_quarter, last_quarter)
+    )
+
+    query = select(
+        Employee.employee_id,
+        func.concat_ws(" ", Employee.last_name, Employee.first_name, Employee.surname).label("fio")
     ).where(
-        or_(and_(ActualWorkingDaysOnEmployee.quarter <= max_quarter_this_year,
-                 ActualWorkingDaysOnEmployee.quarter >= min_quarter_this_year,
-                 ActualWorkingDaysOnEmployee.year == year),
-            and_(ActualWorkingDaysOnEmployee.quarter <= max_quarter_last_year,
-                 ActualWorkingDaysOnEmployee.quarter >= min_quarter_last_year,
-                 ActualWorkingDaysOnEmployee.year == last_year))
-    ).distinct()
-
+        Employee.employee_id.in_(employees_in_window)
+    ).order_by(Employee.employee_id)
     result = await sessions.execute(query)
-    list_employees = result.all()
 
-    if list_employees == None:
-        return {"status": "Empty employees"}
-
-    list_id_employees = []
-
-    for emp in list_employees:
-        list_id_employees.append(emp[0])
-
-    query = select(Employee)
-    result = await sessions.execute(query)
-    list_employees = result.all()
-
-    if list_employees == None:
-        return {"status": "Empty employees"}
-
-    return_employees = dict()
-
-    for emp in list_employees:
-        if emp[0] in list_id_employees:
-            fio = emp[2] + " " + emp[1] + " " + emp[3]
-            return_employees[emp[0]] = fio
+    return_employees = {row.employee_id: row.fio for row in result}
 
     return {"status": "OK",
             "data": return_employees}
@@ -120,20 +84,20 @@ async def get_employees (quarter: int, id_choise_depart: int, year: int, session
     path= "/metrics",
     status_code=status.HTTP_200_OK,
 )
-async def get_metrics (quarter: int, sessions: AsyncSession = Depends(get_async_session)):
+async def get_metrics (quarter: int, cache: ReferenceCache = Depends(get_reference_cache)):
 
-    query = select(MetricsInQuartal).where(MetricsInQuartal.quartal == quarter)
-    result = await sessions.execute(query)
-    list_metrics = result.scalars().all()
-    if list_metrics == None:
+    # Конфигурация квартала и каталог метрик берутся из кэша справочников
+    list_metrics = [
+        item for item in await cache.get(METRICS_IN_QUARTAL)
+        if item.quartal == quarter
+    ]
+    if not list_metrics:
         return {"status": "Empty metrics"}
 
     metrics_id = list_metrics[0].metrics_id
     durations = list_metrics[0].duration
 
-    query = select(MetricDescription).where(MetricDescription.is_active == True)
-    result = await sessions.execute(query)
-    list_metrics = result.scalars().all()
+    list_metrics = await cache.get(ACTIVE_METRICS)
 
     metrics = dict()
 
@@ -163,14 +127,7 @@ async def get_metrics (quarter: int, sessions: AsyncSession = Depends(get_async_
 )
 async def post_metrics (post_metrics: PostMetrics, sessions: AsyncSession = Depends(get_async_session)):
 
-    query = select(EmployeesToMetrics.id)
-    result = await sessions.execute(query)
-    list_res = result.all()
-
-    id = max(res[0] for res in list_res) + 1 if list_res else 0
-
     data = {
-        "id": id,
         "metrics_id": post_metrics.metrics,
         "year": post_metrics.year,
         "quarter": post_metrics.quarter,
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+import asyncpg
+from fastapi import Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config.settings import PostgresSettings
+from api.infrastructure.storage.sqlalchemy.models.asos_models import (
+    Department,
+    FacultyAndInstitute,
+    MetricDescription,
+    MetricsInQuartal,
+    Role,
+    Section,
+)
+from api.presentation.api.v1.table_maker_3.export_rows import MetricRow, SectionRow
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CHANNEL = "reference_cache"
+KEEPALIVE_INTERVAL = 30
+RECONNECT_DELAY = 5
+
+SECTIONS = "sections"
+FACULTIES = "faculties"
+DEPARTMENTS = "departments"
+ROLES = "roles"
+METRICS_IN_QUARTAL = "metrics_in_quartal"
+ACTIVE_METRICS = "active_metrics"
+
+
+class RoleRow(NamedTuple):
+    role_id: int
+    role: Optional[str]
+
+
+class FacultyRow(NamedTuple):
+    id: int
+    name: Optional[str]
+
+
+class DepartmentRow(NamedTuple):
+    id: int
+    name_of_department: str
+    affiliation: Optional[int]
+    id_facultet: Optional[int]
+
+
+class QuartalMetricsRow(NamedTuple):
+    id: int
+    quartal: Optional[int]
+    duration: Optional[Tuple[int, ...]]
+    metrics_id: Optional[Tuple[int, ...]]
+
+
+def _as_tuple(values) -> Optional[tuple]:
+    return None if values is None else tuple(values)
+
+
+async def _load_sections(session: AsyncSession) -> Tuple[SectionRow, ...]:
+    result = await session.execute(select(Section).order_by(Section.id))
+    return tuple(SectionRow.from_model(s) for s in result.scalars())
+
+
+async def _load_faculties(session: AsyncSession) -> Tuple[FacultyRow, ...]:
+    result = await session.execute(
+        select(FacultyAndInstitute).order_by(FacultyAndInstitute.id)
+    )
+    return tuple(FacultyRow(f.id, f.name) for f in result.scalars())
+
+
+async def _load_departments(session: AsyncSession) -> Tuple[DepartmentRow, ...]:
+    result = await session.execute(select(Department).order_by(Department.id))
+    return tuple(
+        DepartmentRow(d.id, d.name_of_department, d.affiliation, d.id_facultet)
+        for d in result.scalars()
+    )
+
+
+async def _load_roles(session: AsyncSession) -> Tuple[RoleRow, ...]:
+    result = await session.execute(select(Role).order_by(Role.role_id))
+    return tuple(RoleRow(r.role_id, r.role) for r in result.scalars())
+
+
+async def _load_metrics_in_quartal(session: AsyncSession) -> Tuple[QuartalMetricsRow, ...]:
+    result = await session.execute(
+        select(MetricsInQuartal).order_by(MetricsInQuartal.id)
+    )
+    return tuple(
+        QuartalMetricsRow(
+            m.id, m.quartal, _as_tuple(m.duration), _as_tuple(m.metrics_id)
+        )
+        for m in result.scalars()
+    )
+
+
+async def _load_active_metrics(session: AsyncSession) -> Tuple[MetricRow, ...]:
+    result = await session.execute(
+        select(MetricDescription)
+        .where(MetricDescription.is_active == True)
+        .order_by(MetricDescription.metric_number, MetricDescription.metric_subnumber)
+    )
+    return tuple(MetricRow.from_model(m) for m in result.scalars())
+
+
+LOADERS: Dict[str, Callable[[AsyncSession], Awaitable[tuple]]] = {
+    SECTIONS: _load_sections,
+    FACULTIES: _load_faculties,
+    DEPARTMENTS: _load_departments,
+    ROLES: _load_roles,
+    METRICS_IN_QUARTAL: _load_metrics_in_quartal,
+    ACTIVE_METRICS: _load_active_metrics,
+}
+
+
+class ReferenceCache:
+    """
+    Кэш справочников (разделы, факультеты, кафедры, роли, конфигурации
+    кварталов, активный каталог метрик) в памяти воркера.
+
+    Значения — кортежи неизменяемых строк (NamedTuple). Роутеры, которые
+    меняют справочник, вызывают invalidate_reference_data до коммита:
+    NOTIFY уходит вместе с транзакцией, и каждый воркер, слушающий канал
+    REFERENCE_CHANNEL, сбрасывает у себя запись. Пока соединение LISTEN
+    не установлено, кэш не используется и данные читаются из БД.
+    """
+
+    def __init__(
+            self,
+            session_factory,
+            loaders: Dict[str, Callable[[AsyncSession], Awaitable[tuple]]] = LOADERS,
+    ):
+        self._session_factory = session_factory
+        self._loaders = loaders
+        self._entries: Dict[str, tuple] = {}
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.listening = False
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.invalidations: Dict[str, int] = defaultdict(int)
+
+    async def get(self, name: str) -> tuple:
+        if self.listening and name in self._entries:
+            self.hits[name] += 1
+            return self._entries[name]
+
+        self.misses[name] += 1
+        async with self._locks[name]:
+            if self.listening and name in self._entries:
+                return self._entries[name]
+            generation = self._generations[name]
+            async with self._session_factory() as session:
+                value = await self._loaders[name](session)
+            # Сброс во время загрузки означает, что прочитаны могли быть
+            # уже устаревшие данные: отдаем их, но не запоминаем
+            if self.listening and self._generations[name] == generation:
+                self._entries[name] = value
+            return value
+
+    def invalidate_local(self, *names: str):
+        for name in names:
+            self._entries.pop(name, None)
+            self._generations[name] += 1
+            self.invalidations[name] += 1
+
+    def invalidate_all(self):
+        self.invalidate_local(*self._loaders)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        if payload in self._loaders:
+            self.invalidate_local(payload)
+        else:
+            self.invalidate_all()
+
+    async def listen(self, settings: PostgresSettings):
+        """Слушает канал сброса, при обрыве переподключается"""
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(
+                    host=settings.host,
+                    port=settings.port,
+                    user=settings.user,
+                    password=settings.password,
+                    database=settings.database,
+                )
+                await connection.add_listener(REFERENCE_CHANNEL, self._on_notify)
+                # Уведомления, пришедшие без подписки, потеряны
+                self.invalidate_all()
+                self.listening = True
+                while True:
+                    await asyncio.sleep(KEEPALIVE_INTERVAL)
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reference cache listener failed")
+            finally:
+                self.listening = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            "listening": self.listening,
+            "entries": {name: len(value) for name, value in self._entries.items()},
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "invalidations": dict(self.invalidations),
+        }
+
+
+def get_reference_cache(request: Request) -> ReferenceCache:
+    return request.app.state.reference_cache
+
+
+async def invalidate_reference_data(session: AsyncSession, *names: str):
+    """
+    Сбрасывает справочники во всех воркерах после коммита транзакции
+    session. Вызывается до commit(); при откате уведомление не уходит.
+    """
+    for name in names:
+        await session.execute(select(func.pg_notify(REFERENCE_CHANNEL, name)))
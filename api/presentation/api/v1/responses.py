@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Mapping, Optional
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Result
+from starlette import status
+
+
+def rows_to_dicts(result: Result) -> List[Dict[str, Any]]:
+    """Строки результата как словари: имена колонок запроса — ключи ответа"""
+    return [dict(row) for row in result.mappings()]
+
+
+def trusted_response(
+    content: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Mapping[str, str]] = None,
+) -> ORJSONResponse:
+    """
+    Быстрый путь для данных, которые пришли прямо из БД и уже имеют форму
+    response_model маршрута: возвращенный Response FastAPI отдает как
+    есть, без повторной проверки pydantic и jsonable_encoder, а orjson
+    сам сериализует даты и числа. response_model у маршрута остается
+    для схемы OpenAPI.
+    """
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable, Iterable, List, Literal, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+StreamFormat = Literal["json", "ndjson", "csv"]
+
+STREAM_CHUNK_ROWS = 500
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _iter_partitions(
+    request: Request,
+    stmt: Select,
+) -> AsyncIterator[list]:
+    # Сессия открывается здесь, а не через Depends: зависимости с yield
+    # закрываются до того, как StreamingResponse начнет отдавать тело.
+    session_factory = request.app.state.sa_session_factory
+    async with session_factory() as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=STREAM_CHUNK_ROWS)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+
+async def _ndjson_chunks(
+    partitions: AsyncIterator[list],
+    to_record: Callable[..., dict],
+) -> AsyncIterator[str]:
+    async for partition in partitions:
+        yield "".join(
+            json.dumps(to_record(row), ensure_ascii=False, default=str) + "\n"
+            for row in partition
+        )
+
+
+async def _csv_chunks(
+    partitions: AsyncIterator[list],
+    fields: List[str],
+    to_csv_rows: Callable[..., Iterable[list]],
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for partition in partitions:
+        for row in partition:
+            writer.writerows(to_csv_rows(row))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_rows(
+    request: Request,
+    stmt: Select,
+    output_format: StreamFormat,
+    to_record: Callable[..., dict],
+    csv_fields: List[str],
+    to_csv_rows: Optional[Callable[..., Iterable[list]]] = None,
+    filename: str = "export",
+) -> StreamingResponse:
+    """
+    Отдает результат запроса потоком NDJSON или CSV через серверный
+    курсор: строки читаются пачками по STREAM_CHUNK_ROWS и сразу
+    отправляются клиенту, память не зависит от объема выгрузки.
+    """
+    partitions = _iter_partitions(request, stmt)
+    headers = {}
+    if output_format == "csv":
+        if to_csv_rows is None:
+            def to_csv_rows(row):
+                record = to_record(row)
+                return [[record[field] for field in csv_fields]]
+        body = _csv_chunks(partitions, csv_fields, to_csv_rows)
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}.csv"',
+            "Access-Control-Expose-Headers": "Content-Disposition",
+        }
+    else:
+        body = _ndjson_chunks(partitions, to_record)
+    return StreamingResponse(
+        body, media_type=MEDIA_TYPES[output_format], headers=headers
+    )
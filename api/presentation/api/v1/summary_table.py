@@ -1,142 +1,296 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, case, func, null, true, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import (
     MetricsInQuartal,
     ActualWorkingDays,
     ActualWorkingDaysOnEmployee,
-    EmployeesToMetrics,
+    Department,
+    DepartmentsMetrics,
     MetricDescription
 )
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.working_days_index import (
+    WorkingDaysIndex,
+    absolute_quarter,
+    lookback_window,
+)
 
 router = APIRouter()
 
 
-async def get_metrics_in_quarter(
-        session: AsyncSession,
-        quarter: int
-) -> MetricsInQuartal:
-    """Get metrics configuration for specified quarter and year"""
-    result = await session.execute(
-        select(MetricsInQuartal).where(
+ACTING_JOB_TITLES = ("ИО", "ВРИО")
+ACTING_JOB_TITLE_FACTOR = 0.5
+
+
+def build_quarter_metrics_query(quarter: int) -> tuple:
+    """
+    Build a query over metrics configured for the quarter with their names,
+    ordered as in MetricsInQuartal.metrics_id. Returns the query and the
+    unnested (metric_id, duration, position) relation.
+
+    unnest pads the shorter of metrics_id/duration with NULL, such rows are
+    skipped: the pairs are truncated to the shorter array, as zip does.
+    """
+    config = (
+        select(MetricsInQuartal.metrics_id, MetricsInQuartal.duration)
+        .where(MetricsInQuartal.quartal == quarter)
+        .order_by(MetricsInQuartal.id)
+        .limit(1)
+        .subquery("config")
+    )
+    items = func.unnest(config.c.metrics_id, config.c.duration).table_valued(
+        "metric_id", "duration", with_ordinality="position"
+    ).render_derived().lateral("items")
+    query = (
+        select(
+            items.c.metric_id,
+            items.c.duration,
+            MetricDescription.metric_number,
+            MetricDescription.metric_subnumber
+        )
+        .select_from(config)
+        .join(items, true())
+        .outerjoin(
+            MetricDescription,
+            and_(
+                MetricDescription.metric_id == items.c.metric_id,
+                MetricDescription.is_active == True
+            )
+        )
+        .where(
             and_(
-                MetricsInQuartal.quartal == quarter
+                items.c.metric_id.is_not(None),
+                items.c.duration.is_not(None)
             )
         )
+        .order_by(items.c.position)
     )
-    return result.scalar_one_or_none()
+    return query, items
 
 
-async def get_employee_metrics_values(
+async def get_summary_metrics(
         session: AsyncSession,
-        employee_id: int,
         quarter: int,
-        year: int
-) -> List[int]:
-    """Get employee's metrics values for specified quarter"""
-    result = await session.execute(
-        select(EmployeesToMetrics.value).where(
+        year: int,
+        department_id: int
+) -> List:
+    """
+    Get metrics configured for the quarter with their names and department
+    values in one query, ordered as in MetricsInQuartal.metrics_id
+    """
+    query, items = build_quarter_metrics_query(quarter)
+    value = (
+        select(DepartmentsMetrics.value)
+        .where(
             and_(
-                EmployeesToMetrics.employee_id == employee_id,
-                EmployeesToMetrics.quarter == quarter,
-                EmployeesToMetrics.year == year
+                DepartmentsMetrics.metrics_id == items.c.metric_id,
+                DepartmentsMetrics.department_id == department_id,
+                DepartmentsMetrics.year == year,
+                DepartmentsMetrics.quarter == quarter
             )
         )
+        .order_by(
+            DepartmentsMetrics.period_date.desc(),
+            DepartmentsMetrics.id.desc()
+        )
+        .limit(1)
+        .scalar_subquery()
     )
-    row = result.scalar_one_or_none()
-    return row if row else [0]
+    result = await session.execute(
+        query.add_columns(func.coalesce(value, 0).label("value"))
+    )
+    return result.all()
 
 
-async def get_work_days_data(
+async def get_departments_metrics_values(
         session: AsyncSession,
+        department_ids: List[int],
+        metric_ids: List[int],
+        quarter: int,
         year: int
-) -> Dict[int, List[int]]:
-    """Get actual working days data for year by quarters"""
+) -> Dict[tuple, int]:
+    """Get the latest value of every (department, metric) pair in one query"""
     result = await session.execute(
-        select(ActualWorkingDays).where(
-            ActualWorkingDays.year == year
-        ).order_by(ActualWorkingDays.month)
+        select(
+            DepartmentsMetrics.department_id,
+            DepartmentsMetrics.metrics_id,
+            DepartmentsMetrics.value
+        )
+        .where(
+            and_(
+                DepartmentsMetrics.department_id.in_(department_ids),
+                DepartmentsMetrics.metrics_id.in_(metric_ids),
+                DepartmentsMetrics.year == year,
+                DepartmentsMetrics.quarter == quarter
+            )
+        )
+        .distinct(
+            DepartmentsMetrics.department_id,
+            DepartmentsMetrics.metrics_id
+        )
+        .order_by(
+            DepartmentsMetrics.department_id,
+            DepartmentsMetrics.metrics_id,
+            DepartmentsMetrics.period_date.desc(),
+            DepartmentsMetrics.id.desc()
+        )
     )
-    quarters_data = {1: [], 2: [], 3: [], 4: []}
-    for record in result.scalars():
-        quarters_data[record.quarter].append(record.count_day)
-    return quarters_data
+    return {
+        (department_id, metric_id): value or 0
+        for department_id, metric_id, value in result
+    }
 
 
-async def get_employee_work_days(
+async def get_working_days_index(
         session: AsyncSession,
-        employee_id: int,
-        department_id: int,
-        year: int
-) -> Dict[int, List[Dict]]:
-    """Get employee's working days data by quarters"""
-    result = await session.execute(
-        select(ActualWorkingDaysOnEmployee).where(
+        first_quarter: int,
+        last_quarter: int,
+        *employee_filters
+) -> WorkingDaysIndex:
+    """
+    Build a prefix-sum index of calendar working days and working days of
+    the employees matching employee_filters over the absolute quarters
+    [first_quarter, last_quarter] from one query. Employee days of acting
+    positions are weighted by ACTING_JOB_TITLE_FACTOR, employees are keyed
+    by (employee_id, department_id).
+    """
+    years = list(range(first_quarter // 4, last_quarter // 4 + 1))
+    calendar_days = (
+        select(
+            null().label("employee_id"),
+            null().label("department_id"),
+            ActualWorkingDays.year,
+            ActualWorkingDays.quarter,
+            func.sum(ActualWorkingDays.count_day).label("days")
+        )
+        .where(ActualWorkingDays.year.in_(years))
+        .group_by(ActualWorkingDays.year, ActualWorkingDays.quarter)
+    )
+    employee_days = (
+        select(
+            ActualWorkingDaysOnEmployee.employee_id,
+            ActualWorkingDaysOnEmployee.department_id,
+            ActualWorkingDaysOnEmployee.year,
+            ActualWorkingDaysOnEmployee.quarter,
+            func.sum(
+                ActualWorkingDaysOnEmployee.count_day * case(
+                    (
+                        ActualWorkingDaysOnEmployee.jobtitle.in_(
+                            ACTING_JOB_TITLES
+                        ),
+                        ACTING_JOB_TITLE_FACTOR
+                    ),
+                    else_=1
+                )
+            ).label("days")
+        )
+        .where(
             and_(
-                ActualWorkingDaysOnEmployee.employee_id == employee_id,
-                ActualWorkingDaysOnEmployee.department_id == department_id,
-                ActualWorkingDaysOnEmployee.year == year
+                ActualWorkingDaysOnEmployee.year.in_(years),
+                *employee_filters
+            )
+        )
+        .group_by(
+            ActualWorkingDaysOnEmployee.employee_id,
+            ActualWorkingDaysOnEmployee.department_id,
+            ActualWorkingDaysOnEmployee.year,
+            ActualWorkingDaysOnEmployee.quarter
+        )
+    )
+    result = await session.execute(union_all(calendar_days, employee_days))
+
+    calendar_totals = []
+    employee_totals = []
+    for employee_id, department_id, year, quarter, days in result:
+        if employee_id is None:
+            calendar_totals.append((year, quarter, float(days)))
+        else:
+            employee_totals.append(
+                ((employee_id, department_id), year, quarter, float(days))
             )
-        ).order_by(ActualWorkingDaysOnEmployee.month)
+    return WorkingDaysIndex.from_totals(
+        first_quarter, last_quarter, calendar_totals, employee_totals
+    )
+
+
+def get_duration_windows(
+        durations: List[int],
+        target_year: int,
+        target_quarter: int
+) -> List[tuple]:
+    """
+    Map every metric duration to the window of absolute quarters it covers:
+    duration quarters ending with the target quarter
+    """
+    return [
+        lookback_window(duration, target_year, target_quarter)
+        for duration in durations
+    ]
+
+
+def calculate_work_coefficients_batch(
+        durations: List[int],
+        index: WorkingDaysIndex,
+        employee_keys: List[tuple],
+        target_year: int,
+        target_quarter: int
+) -> tuple:
+    """
+    Calculate work coefficients for metrics of many employees at once.
+
+    Returns arrays of calendar days (metrics,), employee days
+    (employees, metrics) and coefficients (employees, metrics).
+    """
+    windows = get_duration_windows(durations, target_year, target_quarter)
+
+    # Если данных о рабочих днях нет, коэффициент и дни сотрудника равны 0
+    total_work_days = index.calendar_days(windows).astype(np.int64)
+    has_work_days = total_work_days > 0
+
+    employee_total_days = index.employee_days(employee_keys, windows)
+    employee_total_days *= has_work_days
+
+    coefficients = np.round(
+        np.divide(
+            employee_total_days,
+            total_work_days,
+            out=np.zeros_like(employee_total_days),
+            where=has_work_days
+        ),
+        2
     )
-    quarters_data = {1: [], 2: [], 3: [], 4: []}
-    for record in result.scalars():
-        quarters_data[record.quarter].append({
-            "days": record.count_day,
-            "jobtitle": record.jobtitle
-        })
-    return quarters_data
+    return total_work_days, employee_total_days, coefficients
 
 
 async def calculate_work_coefficients(
         durations: List[int],
-        work_days: Dict[int, Dict[int, List[int]]],
-        employee_days: Dict[int, Dict[int, List[Dict]]],
+        index: WorkingDaysIndex,
+        employee_key: tuple,
         target_year: int,
         target_quarter: int
 ) -> tuple:
     """Calculate work coefficients for metrics"""
-    coefficients = []
-    total_work_days = []
-    employee_total_days = []
-
-    for duration in durations:
-        # Определяем год и квартал для расчета
-        quarter = target_quarter
-        year = target_year
-
-        # Если duration выходит за пределы текущего года, корректируем год и квартал
-        if duration > 4:
-            year -= 1
-            quarter = 4 - (duration - 4)
-
-        # Проверяем, есть ли данные для этого года и квартала
-        if year not in work_days or quarter not in work_days[year]:
-            coefficients.append(0)
-            total_work_days.append(0)
-            employee_total_days.append(0)
-            continue
-
-        # Суммируем рабочие дни
-        work_days_sum = sum(work_days[year][quarter])
-
-        # Суммируем дни сотрудника с учетом коэффициента для должности
-        employee_days_sum = 0
-        for day_data in employee_days.get(year, {}).get(quarter, []):
-            korr = 0.5 if day_data["jobtitle"] in ["ИО", "ВРИО"] else 1
-            employee_days_sum += day_data["days"] * korr
-
-        # Рассчитываем коэффициент
-        coefficient = round(employee_days_sum / work_days_sum, 2) if work_days_sum else 0
-
-        coefficients.append(coefficient)
-        total_work_days.append(work_days_sum)
-        employee_total_days.append(employee_days_sum)
+    total_work_days, employee_total_days, coefficients = (
+        calculate_work_coefficients_batch(
+            durations, index, [employee_key], target_year, target_quarter
+        )
+    )
+    return (
+        total_work_days.tolist(),
+        employee_total_days[0].tolist(),
+        coefficients[0].tolist()
+    )
 
-    return total_work_days, employee_total_days, coefficients
+
+def get_index_bounds(durations: List[int], year: int, quarter: int) -> tuple:
+    """Absolute quarters the index must cover for all duration windows"""
+    windows = get_duration_windows(durations, year, quarter)
+    return min(w[0] for w in windows), absolute_quarter(year, quarter)
 
 
 @router.get("/metrics", status_code=status.HTTP_200_OK)
@@ -147,46 +301,48 @@ async def get_metrics_summary(
         department_id: int = Query(..., description="ID отдела"),
         session: AsyncSession = Depends(get_async_session),
 ):
+    """
+    Сводная таблица метрик сотрудника за квартал.
 
-    # Получаем базовые данные
-    metrics_config = await get_metrics_in_quarter(session, quarter)
-    if not metrics_config:
-        return {"status": "Empty metrics configuration"}
-
-    # Получаем значения метрик сотрудника
-    metrics_values = await get_employee_metrics_values(
-        session, employee_id, quarter, year
+    Значение метрики берется из последней записи departments_metrics
+    отдела за год и квартал (по period_date — дате последнего сохранения
+    ячейки, затем id) независимо от
+    автора записи; раньше значения брались из записей самого сотрудника
+    в employees_to_metrics. Маршрут делает два запроса к БД
+    (benchmarks/summary_table.py).
+    """
+    # Метрики квартала, их названия и значения — один запрос
+    metric_rows = await get_summary_metrics(
+        session, quarter, year, department_id
     )
+    if not metric_rows:
+        return {"status": "Empty metrics configuration"}
 
-    # Получаем данные по рабочим дням
-    current_year_work_days = await get_work_days_data(session, year)
-    last_year_work_days = await get_work_days_data(session, year - 1)
+    durations = [row.duration for row in metric_rows]
+    metrics = [
+        f"{row.metric_number}{row.metric_subnumber or ''}"
+        if row.metric_number is not None else ""
+        for row in metric_rows
+    ]
+    metrics_values = [row.value for row in metric_rows]
 
-    # Получаем данные сотрудника
-    current_year_employee_days = await get_employee_work_days(
-        session, employee_id, department_id, year
-    )
-    last_year_employee_days = await get_employee_work_days(
-        session, employee_id, department_id, year - 1
+    # Рабочие дни за все окна метрик — второй запрос
+    index = await get_working_days_index(
+        session,
+        *get_index_bounds(durations, year, quarter),
+        ActualWorkingDaysOnEmployee.employee_id == employee_id,
+        ActualWorkingDaysOnEmployee.department_id == department_id
     )
 
     # Рассчитываем коэффициенты
     work_days, employee_days, coefficients = await calculate_work_coefficients(
-        metrics_config.duration,
-        {year: current_year_work_days, year - 1: last_year_work_days},
-        {year: current_year_employee_days, year - 1: last_year_employee_days},
+        durations,
+        index,
+        (employee_id, department_id),
         year,  # Передаем целевой год
         quarter  # Передаем целевой квартал
     )
 
-    # Формируем список метрик
-    result = await session.execute(select(MetricDescription).where(MetricDescription.is_active == True))
-    metrics = [
-        f"{m.metric_number}{m.metric_subnumber or ''}"
-        for m in result.scalars()
-        if m.metric_id in metrics_config.metrics_id
-    ]
-
     # Рассчитываем значения с коэффициентами
     adjusted_values = [
         round(value * coeff, 2)
@@ -196,7 +352,7 @@ async def get_metrics_summary(
     return {
         "status": "OK",
         "data": {
-            "duration": metrics_config.duration,
+            "duration": durations,
             "metrics": metrics,
             "work_day": work_days,
             "employee_day": employee_days,
@@ -204,4 +360,95 @@ async def get_metrics_summary(
             "metrics_value": metrics_values,
             "metrics_value_koff": adjusted_values,
         }
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/metrics/batch", status_code=status.HTTP_200_OK)
+async def get_metrics_summary_batch(
+        quarter: int = Query(..., description="Квартал"),
+        year: int = Query(..., description="Год"),
+        department_id: Optional[int] = Query(None, description="ID отдела"),
+        faculty_id: Optional[int] = Query(None, description="ID факультета"),
+        session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Сводная таблица сразу для всех сотрудников кафедры или факультета.
+    Для каждого сотрудника возвращается та же структура, что и в /metrics.
+    """
+    if department_id is None and faculty_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="department_id or faculty_id is required"
+        )
+
+    department_filter = (
+        ActualWorkingDaysOnEmployee.department_id == department_id
+        if department_id is not None
+        else ActualWorkingDaysOnEmployee.department_id.in_(
+            select(Department.id).where(Department.id_facultet == faculty_id)
+        )
+    )
+
+    query, _ = build_quarter_metrics_query(quarter)
+    result = await session.execute(query)
+    metric_rows = result.all()
+    if not metric_rows:
+        return {"status": "Empty metrics configuration"}
+
+    durations = [row.duration for row in metric_rows]
+    metric_ids = [row.metric_id for row in metric_rows]
+    metrics = [
+        f"{row.metric_number}{row.metric_subnumber or ''}"
+        if row.metric_number is not None else ""
+        for row in metric_rows
+    ]
+
+    # Рабочие дни всех сотрудников подразделения за один проход
+    index = await get_working_days_index(
+        session,
+        *get_index_bounds(durations, year, quarter),
+        department_filter
+    )
+    employee_keys = sorted(index.employee_keys())
+    if not employee_keys:
+        return {"status": "OK", "data": []}
+
+    department_ids = sorted({key[1] for key in employee_keys})
+    values_map = await get_departments_metrics_values(
+        session, department_ids, metric_ids, quarter, year
+    )
+
+    work_days, employee_days, coefficients = calculate_work_coefficients_batch(
+        durations,
+        index,
+        employee_keys,
+        year,
+        quarter
+    )
+    metrics_values = np.array(
+        [
+            [values_map.get((dep_id, m_id), 0) for m_id in metric_ids]
+            for _, dep_id in employee_keys
+        ],
+        dtype=np.int64
+    )
+    adjusted_values = np.round(metrics_values * coefficients, 2)
+
+    work_days_list = work_days.tolist()
+    return {
+        "status": "OK",
+        "data": [
+            {
+                "employee_id": emp_id,
+                "department_id": dep_id,
+                "duration": durations,
+                "metrics": metrics,
+                "work_day": work_days_list,
+                "employee_day": employee_days[i].tolist(),
+                "koff": coefficients[i].tolist(),
+                "metrics_value": metrics_values[i].tolist(),
+                "metrics_value_koff": adjusted_values[i].tolist(),
+            }
+            for i, (emp_id, dep_id) in enumerate(employee_keys)
+        ]
+    }
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Request
+from starlette import status
+
+from api.infrastructure.storage.sqlalchemy.factories import get_sa_pool_stats
+
+router = APIRouter()
+
+
+@router.get(
+    path="/db_pool",
+    status_code=status.HTTP_200_OK,
+)
+async def get_db_pool_stats(request: Request):
+    """
+    Состояние пула соединений текущего воркера.
+    """
+    settings = request.app.state.settings.database
+    return {
+        "status": "OK",
+        "data": {
+            **get_sa_pool_stats(request.app.state.sa_engine),
+            "configured_pool_size": settings.pool_size,
+            "configured_max_overflow": settings.max_overflow,
+            "pool_recycle": settings.pool_recycle,
+            "pool_pre_ping": settings.pool_pre_ping,
+            "statement_cache_size": settings.statement_cache_size,
+        },
+    }
+
+
+@router.get(
+    path="/export_pool",
+    status_code=status.HTTP_200_OK,
+)
+async def get_export_pool_stats(request: Request):
+    """
+    Очередь и исполнители выгрузок Excel текущего воркера.
+    """
+    return {
+        "status": "OK",
+        "data": {
+            **request.app.state.export_pool.stats(),
+            "catalog_cache": request.app.state.catalog_cache.stats(),
+        },
+    }
+
+
+@router.get(
+    path="/reference_cache",
+    status_code=status.HTTP_200_OK,
+)
+async def get_reference_cache_stats(request: Request):
+    """
+    Попадания и промахи кэша справочников текущего воркера.
+    """
+    return {
+        "status": "OK",
+        "data": request.app.state.reference_cache.stats(),
+    }
+
+
+@router.get(
+    path="/auth_api",
+    status_code=status.HTTP_200_OK,
+)
+async def get_auth_api_stats(request: Request):
+    """
+    Состояние клиента сервиса авторизации текущего воркера.
+    """
+    return {
+        "status": "OK",
+        "data": request.app.state.auth_api_client.stats(),
+    }
+
+
+@router.get(
+    path="/token_auth",
+    status_code=status.HTTP_200_OK,
+)
+async def get_token_auth_stats(request: Request):
+    """
+    Кэши проверки токенов доступа текущего воркера.
+    """
+    return {
+        "status": "OK",
+        "data": {
+            **request.app.state.token_verifier.stats(),
+            "employee_cache": request.app.state.employee_directory.stats(),
+        },
+    }
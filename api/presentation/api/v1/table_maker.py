@@ -1,50 +1,63 @@
-from sqlalchemy import select
+from typing import Awaitable, BinaryIO, Callable, Dict, NamedTuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from api.infrastructure.storage.sqlalchemy.models.asos_models import MetricDescription, Section, EmployeesToMetrics, \
-    EmployeeResponsibility, Responsibility, Employee, Role
+    EmployeeResponsibility, Responsibility, Employee
 from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1.reference_cache import (
+    ACTIVE_METRICS, ROLES, SECTIONS, ReferenceCache, get_reference_cache
+)
 from api.presentation.api.v1.table_maker_3.expertsTableMaker import ExpertTableMaker
-from api.presentation.api.v1.table_maker_3.metricsTableMaker import TableMaker3
-from fastapi import APIRouter, Body, Response, Depends
-from fastapi.responses import FileResponse
+from api.presentation.api.v1.table_maker_3.metricsTableMaker import TableMaker3, template_digest
+from api.presentation.api.v1.table_maker_3.catalog_cache import cached_workbook_response
+from api.presentation.api.v1.table_maker_3.export_pool import render_export
+from api.presentation.api.v1.table_maker_3.workbook_output import workbook_response
+from fastapi import APIRouter, Body, Request, Response, Depends
 router = APIRouter()
 
-@router.get(
-    path= "/metrics",
-    status_code=status.HTTP_200_OK,
-    )
-async def metrics(sessions: AsyncSession = Depends(get_async_session)):
-    query = select(MetricDescription).where(MetricDescription.is_active == True).order_by(MetricDescription.metric_number, MetricDescription.metric_subnumber)
-    result = await sessions.execute(query)
-    metrics = result.scalars().all()
-
-    query = select(Section)
-    result = await sessions.execute(query)
-    sections = result.scalars().all()
-    TableMaker3.make_excel(metrics, sections)
-    headers = {'Access-Control-Expose-Headers': 'Content-Disposition'}
-    return FileResponse("api/infrastructure/excel/table_maker_3.xlsx", filename="table_maker_3.xlsx", headers=headers)
+# Увеличить при изменении разметки книги в TableMaker3
+CATALOG_WORKBOOK_FORMAT = 1
 
-@router.get(
-    path="/experts",
-    status_code=status.HTTP_200_OK,
-)
-async def experts(session: AsyncSession = Depends(get_async_session)):
-    # 1. Загружаем MetricDescription и Section
-    metrics_q = select(
-        MetricDescription
-    ).where(MetricDescription.is_active == True).order_by(
-        MetricDescription.metric_number,
-        MetricDescription.metric_subnumber
-    )
-    res_metrics = await session.execute(metrics_q)
-    metrics = res_metrics.scalars().all()
 
-    sections_q = select(Section)
-    res_sections = await session.execute(sections_q)
-    sections = res_sections.scalars().all()
+async def get_catalog_version(session: AsyncSession) -> str:
+    """
+    Версия каталога метрик одним запросом: update_metrics всегда создает
+    новые записи MetricDescription, поэтому max(metric_id), max(date_start)
+    и число активных метрик меняются при каждом обновлении; разделы
+    учитываются контрольной суммой.
+    """
+    sections_checksum = select(
+        func.md5(func.string_agg(
+            func.concat_ws(':', Section.id, Section.description),
+            aggregate_order_by('|', Section.id)
+        ))
+    ).scalar_subquery()
+    query = select(
+        func.max(MetricDescription.metric_id),
+        func.max(MetricDescription.date_start),
+        func.count(),
+        sections_checksum,
+    ).where(MetricDescription.is_active == True)
+    max_metric_id, max_date_start, active_count, checksum = (await session.execute(query)).one()
+    return ":".join(map(str, (
+        CATALOG_WORKBOOK_FORMAT, template_digest(),
+        max_metric_id, max_date_start, active_count, checksum
+    )))
+
+
+async def load_metrics_export(session: AsyncSession, cache: ReferenceCache) -> tuple:
+    """Аргументы TableMaker3.make_excel: активные метрики и разделы (из кэша справочников)"""
+    return list(await cache.get(ACTIVE_METRICS)), list(await cache.get(SECTIONS))
+
+
+async def load_experts_export(session: AsyncSession, cache: ReferenceCache) -> tuple:
+    """Аргументы ExpertTableMaker.make_excel"""
+    # 1. Метрики и разделы
+    metrics, sections = await load_metrics_export(session, cache)
 
     # 2. Загружаем EmployeesToMetrics, чтобы получить связь metric_id -> employee_id
     etm_q = select(EmployeesToMetrics)
@@ -63,11 +76,8 @@ async def experts(session: AsyncSession = Depends(get_async_session)):
     res_emp = await session.execute(emp_q)
     emp_list = res_emp.scalars().all()
 
-    # Загружаем роли
-    role_q = select(Role)
-    res_role = await session.execute(role_q)
-    role_list = res_role.scalars().all()
-    role_map = {r.role_id: r.role for r in role_list}
+    # Роли из кэша справочников
+    role_map = {r.role_id: r.role for r in await cache.get(ROLES)}
 
     emp_name_map = {}
     emp_role_map = {}
@@ -76,10 +86,60 @@ async def experts(session: AsyncSession = Depends(get_async_session)):
         emp_name_map[e.employee_id] = f"{e.last_name} {e.first_name} {e.surname}"
         emp_role_map[e.employee_id] = role_map.get(e.role_id, "")
 
-    # 4. Вызываем генерацию Excel
-    ExpertTableMaker.make_excel(metrics, sections, metric_employee_map, emp_name_map, emp_role_map)
+    return metrics, sections, metric_employee_map, emp_name_map, emp_role_map
+
 
-    # 4. Возвращаем созданный файл пользователю
-    file_path = "api/infrastructure/excel/experts.xlsx"
-    headers = {'Access-Control-Expose-Headers': 'Content-Disposition'}
-    return FileResponse(file_path, filename="experts.xlsx", headers=headers)
\ No newline at end of file
+class ExportKind(NamedTuple):
+    load: Callable[[AsyncSession, ReferenceCache], Awaitable[tuple]]
+    render: Callable[..., BinaryIO]
+    filename: str
+
+
+# Выгрузки, доступные через очередь заданий (см. export_jobs)
+EXPORT_KINDS: Dict[str, ExportKind] = {
+    "metrics": ExportKind(load_metrics_export, TableMaker3.make_excel, "table_maker_3.xlsx"),
+    "experts": ExportKind(load_experts_export, ExpertTableMaker.make_excel, "experts.xlsx"),
+}
+
+
+@router.get(
+    path= "/metrics",
+    status_code=status.HTTP_200_OK,
+    )
+async def metrics(
+        request: Request,
+        sessions: AsyncSession = Depends(get_async_session),
+        cache: ReferenceCache = Depends(get_reference_cache),
+):
+    catalog_cache = request.app.state.catalog_cache
+    version = await get_catalog_version(sessions)
+
+    # Повторная выгрузка той же версии каталога отдается из кэша
+    cached = await catalog_cache.lookup(version)
+    if cached is None:
+        async with catalog_cache.lock(version):
+            cached = await catalog_cache.lookup(version)
+            if cached is None:
+                # Книга строится в пуле выгрузок, туда передаются только простые данные
+                buffer = await render_export(
+                    request, TableMaker3.make_excel,
+                    *await load_metrics_export(sessions, cache)
+                )
+                cached = await catalog_cache.store(version, buffer)
+    return cached_workbook_response(request, cached, "table_maker_3.xlsx")
+
+@router.get(
+    path="/experts",
+    status_code=status.HTTP_200_OK,
+)
+async def experts(
+        request: Request,
+        session: AsyncSession = Depends(get_async_session),
+        cache: ReferenceCache = Depends(get_reference_cache),
+):
+    # Книга строится в пуле выгрузок, туда передаются только простые данные
+    buffer = await render_export(
+        request, ExpertTableMaker.make_excel,
+        *await load_experts_export(session, cache)
+    )
+    return workbook_response(buffer, "experts.xlsx")
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from api.presentation.api.v1.table_maker_3.workbook_output import XLSX_MEDIA_TYPE
+
+OBJECT_SUFFIX = ".xlsx"
+REF_SUFFIX = ".ref"
+
+
+class CachedWorkbook(NamedTuple):
+    etag: str
+    path: Path
+    stat: os.stat_result
+
+
+def version_key(version: str) -> str:
+    return hashlib.sha256(version.encode()).hexdigest()
+
+
+class CatalogWorkbookCache:
+    """
+    Кэш готовых книг каталога метрик в каталоге на диске (том
+    files_download), общий для всех воркеров.
+
+    Книги хранятся по хэшу содержимого (<sha256>.xlsx), версия каталога
+    указывает на книгу через файл <sha256 версии>.ref. Хэш содержимого
+    используется как ETag. При превышении max_bytes или max_entries
+    удаляются книги, к которым дольше всего не обращались (время
+    обращения — mtime, обновляется при каждом попадании).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_entries: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def setup(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def lock(self, version: str) -> asyncio.Lock:
+        """Не даем одному воркеру строить одну и ту же версию дважды"""
+        return self._locks.setdefault(version_key(version), asyncio.Lock())
+
+    def _ref_path(self, version: str) -> Path:
+        return self.directory / (version_key(version) + REF_SUFFIX)
+
+    def _object_path(self, etag: str) -> Path:
+        return self.directory / (etag + OBJECT_SUFFIX)
+
+    def _lookup(self, version: str) -> Optional[CachedWorkbook]:
+        try:
+            etag = self._ref_path(version).read_text().strip()
+            path = self._object_path(etag)
+            os.utime(path)
+            return CachedWorkbook(etag, path, path.stat())
+        except FileNotFoundError:
+            return None
+
+    async def lookup(self, version: str) -> Optional[CachedWorkbook]:
+        cached = await run_in_threadpool(self._lookup, version)
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    def _atomic_write(self, target: Path, source: BinaryIO):
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(source, tmp)
+            os.replace(tmp_name, target)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def _store(self, version: str, buffer: BinaryIO) -> CachedWorkbook:
+        digest = hashlib.sha256()
+        buffer.seek(0)
+        while chunk := buffer.read(64 * 1024):
+            digest.update(chunk)
+        etag = digest.hexdigest()
+        path = self._object_path(etag)
+
+        if path.exists():
+            os.utime(path)
+        else:
+            buffer.seek(0)
+            self._atomic_write(path, buffer)
+        with tempfile.SpooledTemporaryFile() as ref:
+            ref.write(etag.encode())
+            ref.seek(0)
+            self._atomic_write(self._ref_path(version), ref)
+
+        self._evict()
+        return CachedWorkbook(etag, path, path.stat())
+
+    async def store(self, version: str, buffer: BinaryIO) -> CachedWorkbook:
+        try:
+            return await run_in_threadpool(self._store, version, buffer)
+        finally:
+            buffer.close()
+
+    def _evict(self):
+        objects = []
+        for path in self.directory.glob("*" + OBJECT_SUFFIX):
+            try:
+                objects.append((path.stat(), path))
+            except FileNotFoundError:
+                continue
+        objects.sort(key=lambda item: item[0].st_mtime, reverse=True)
+
+        total = 0
+        alive = set()
+        for index, (stat, path) in enumerate(objects):
+            total += stat.st_size
+            # Самая свежая книга остается, даже если она больше лимита
+            if index == 0 or (
+                    index < self.max_entries and total <= self.max_bytes
+            ):
+                alive.add(path.stem)
+                continue
+            path.unlink(missing_ok=True)
+
+        for ref in self.directory.glob("*" + REF_SUFFIX):
+            try:
+                if ref.read_text().strip() not in alive:
+                    ref.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+    def stats(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def cached_workbook_response(
+        request: Request, cached: CachedWorkbook, filename: str
+) -> Response:
+    headers = {
+        "ETag": f'"{cached.etag}"',
+        "Cache-Control": "no-cache",
+        "Access-Control-Expose-Headers": "Content-Disposition, ETag",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(
+        cached.path,
+        filename=filename,
+        media_type=XLSX_MEDIA_TYPE,
+        headers=headers,
+        stat_result=cached.stat,
+    )
@@ -1,35 +1,81 @@
+from collections import defaultdict
+from copy import copy
+
 import openpyxl
 import openpyxl.styles
+from openpyxl.cell import WriteOnlyCell
+
+from api.presentation.api.v1.table_maker_3.workbook_output import DEFAULT_SPOOL_MAX_SIZE, save_workbook
+
+COLUMNS = 5
+COLUMN_WIDTHS = {'A': 10, 'B': 10, 'C': 40, 'D': 20, 'E': 20}
+HEADER = ["№", "№", "Показатели", "Имя сотрудника", "Должность"]
+TITLE = (
+    "Зона ответственности экспертов по вводу сведений в системе оценки деятельности "
+    "заведующих кафедрами Московского политехнического университета"
+)
+
+BOLD_ITALIC_FONT = openpyxl.styles.Font(bold=True, italic=True)
+ITALIC_FONT = openpyxl.styles.Font(italic=True)
+CELL_ALIGNMENT = openpyxl.styles.Alignment(wrap_text=True, horizontal='center', vertical='center')
+_THIN = openpyxl.styles.Side(border_style="thin", color="000000")
+CELL_BORDER = openpyxl.styles.Border(top=_THIN, left=_THIN, right=_THIN, bottom=_THIN)
+
 
 class ExpertTableMaker:
     @staticmethod
-    def make_excel(metrics, sections, metric_employee_map, emp_name_map, emp_role_map):
+    def _style(ws, font=None):
+        """Регистрирует оформление в книге один раз, дальше оно только копируется"""
+        cell = WriteOnlyCell(ws)
+        cell.alignment = CELL_ALIGNMENT
+        cell.border = CELL_BORDER
+        if font is not None:
+            cell.font = font
+        return cell._style
+
+    @staticmethod
+    def _row(ws, values, style, first_style=None):
+        """Строка из COLUMNS ячеек, недостающие ячейки пустые"""
+        row = []
+        for col in range(COLUMNS):
+            cell = WriteOnlyCell(ws, value=values[col] if col < len(values) else None)
+            cell._style = copy(first_style if col == 0 and first_style is not None else style)
+            row.append(cell)
+        return row
+
+    @staticmethod
+    def make_excel(metrics, sections, metric_employee_map, emp_name_map, emp_role_map,
+                   spool_max_size=DEFAULT_SPOOL_MAX_SIZE):
         """
-        Формирует Excel-файл table_maker_3.xlsx на основании переданных:
+        Формирует Excel-файл экспертов на основании переданных:
           - metrics: список MetricDescription
           - sections: список Section
           - metric_employee_map: {metric_id: employee_id}
           - emp_name_map: {employee_id: "last first surname"}
           - emp_role_map: {employee_id: role_name}
-        Итоговый файл сохраняется по пути "api/infrastructure/excel/table_maker_3.xlsx".
+        Книга пишется в режиме write_only: каждая строка формируется один раз
+        и сразу уходит в файл. Возвращает буфер с файлом (см. save_workbook).
         """
 
-        wb = openpyxl.Workbook()
-        wb.create_sheet(title='Зоны ответственности', index=0)
-        ws = wb['Зоны ответственности']
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(title='Зоны ответственности')
+        make_row = ExpertTableMaker._row
+        cell_style = ExpertTableMaker._style(ws)
+        bold_italic_style = ExpertTableMaker._style(ws, BOLD_ITALIC_FONT)
+        italic_style = ExpertTableMaker._style(ws, ITALIC_FONT)
+
+        # Ширины колонок задаются до записи строк
+        for column, width in COLUMN_WIDTHS.items():
+            ws.column_dimensions[column].width = width
 
-        bold_italic_font = openpyxl.styles.Font(bold=True, italic=True)
-        italic_font = openpyxl.styles.Font(italic=True)
+        # Метрики по разделам, порядок внутри раздела сохраняется
+        metrics_by_section = defaultdict(list)
+        for metric in metrics:
+            metrics_by_section[getattr(metric, "section_id", None)].append(metric)
 
-        header_data = ["№", "№", "Показатели", "Имя сотрудника", "Должность"]
-        ws.append([
-            "Зона ответственности экспертов по вводу сведений в системе оценки деятельности "
-            "заведующих кафедрами Московского политехнического университета"
-        ])
-        title_cell = ws.cell(row=1, column=1)
-        title_cell.font = bold_italic_font
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=5)
-        ws.append(header_data)
+        ws.append(make_row(ws, [TITLE], cell_style, bold_italic_style))
+        ws.merged_cells.add("A1:E1")
+        ws.append(make_row(ws, HEADER, cell_style))
 
         current_row = 2
         current_category = ""
@@ -41,63 +87,26 @@ class ExpertTableMaker:
 
             if activity and current_category != activity:
                 current_category = activity
-                ws.append([activity])
-                cat_cell = ws.cell(row=ws.max_row, column=1)
-                cat_cell.font = bold_italic_font
                 current_row += 1
-                ws.merge_cells(
-                    start_row=current_row, start_column=1,
-                    end_row=current_row, end_column=5
-                )
-
-            if subname:
-                if subname != "" and current_subname != subname:
-                    current_subname = subname
-                    ws.append([subname])
-                    sub_cell = ws.cell(row=ws.max_row, column=1)
-                    sub_cell.font = italic_font
-                    sub_cell.alignment = openpyxl.styles.Alignment(wrap_text=True)
-                    current_row += 1
-                    ws.merge_cells(
-                        start_row=current_row, start_column=1,
-                        end_row=current_row, end_column=5
-                    )
-
-            for metric in metrics:
-                if getattr(metric, "section_id", None) == getattr(section, "id", None):
-                    number = getattr(metric, "metric_number", "")
-                    subnum = getattr(metric, "metric_subnumber", "") or ""
-                    indicator = getattr(metric, "description", "")
-
-                    m_id = getattr(metric, "metric_id", None)
-                    employee_id = metric_employee_map.get(m_id)
-                    employee_name = emp_name_map.get(employee_id, "")
-                    employee_role = emp_role_map.get(employee_id, "")
-
-                    ws.append([number, subnum, indicator, employee_name, employee_role])
-                    current_row += 1
-
-        for row_cells in ws.iter_rows(min_row=1, max_row=current_row, min_col=1, max_col=5):
-            for cell in row_cells:
-                cell.alignment = openpyxl.styles.Alignment(
-                    wrap_text=True, horizontal='center', vertical='center'
-                )
-
-        ws.column_dimensions['A'].width = 10
-        ws.column_dimensions['B'].width = 10
-        ws.column_dimensions['C'].width = 40
-        ws.column_dimensions['D'].width = 20
-        ws.column_dimensions['E'].width = 20
-
-        thin_side = openpyxl.styles.Side(border_style="thin", color="000000")
-        for row_cells in ws.iter_rows(min_row=1, max_row=current_row, min_col=1, max_col=5):
-            for cell in row_cells:
-                cell.border = openpyxl.styles.Border(
-                    top=thin_side, left=thin_side,
-                    right=thin_side, bottom=thin_side
-                )
-
-        # 7. Сохранение файла
-        output_path = "api/infrastructure/excel/experts.xlsx"
-        wb.save(output_path)
-        print(f"Файл успешно сохранен: {output_path}")
\ No newline at end of file
+                ws.append(make_row(ws, [activity], cell_style, bold_italic_style))
+                ws.merged_cells.add(f"A{current_row}:E{current_row}")
+
+            if subname and current_subname != subname:
+                current_subname = subname
+                current_row += 1
+                ws.append(make_row(ws, [subname], cell_style, italic_style))
+                ws.merged_cells.add(f"A{current_row}:E{current_row}")
+
+            for metric in metrics_by_section.get(getattr(section, "id", None), ()):
+                employee_id = metric_employee_map.get(getattr(metric, "metric_id", None))
+                current_row += 1
+                ws.append(make_row(ws, [
+                    getattr(metric, "metric_number", ""),
+                    getattr(metric, "metric_subnumber", "") or "",
+                    getattr(metric, "description", ""),
+                    emp_name_map.get(employee_id, ""),
+                    emp_role_map.get(employee_id, ""),
+                ], cell_style))
+
+        # Сохранение в буфер запроса
+        return save_workbook(wb, spool_max_size)
@@ -0,0 +1,131 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import BinaryIO, Callable
+
+from fastapi import HTTPException, Request
+from starlette import status
+
+from api.presentation.api.v1.table_maker_3.workbook_output import spool_bytes
+
+EXPORT_RETRY_AFTER_SECONDS = 5
+
+
+class ExportPoolBusy(Exception):
+    pass
+
+
+def _render_to_bytes(render: Callable[..., BinaryIO], *args) -> bytes:
+    # Выполняется в дочернем процессе: файловый буфер нельзя передать
+    # между процессами, поэтому возвращаем содержимое
+    with render(*args) as buffer:
+        return buffer.read()
+
+
+class ExportPool:
+    """
+    Ограниченный пул для построения Excel-выгрузок вне цикла событий.
+
+    Одновременно строится не больше max_workers книг, еще max_queue
+    запросов могут ждать своей очереди, остальные сразу получают
+    ExportPoolBusy. Функции рендера получают только простые данные
+    (см. export_rows), последним аргументом передается spool_max_size.
+    """
+
+    def __init__(
+            self,
+            executor_kind: str,
+            max_workers: int,
+            max_queue: int,
+            spool_max_size: int,
+    ):
+        if executor_kind not in ("process", "thread"):
+            raise ValueError(f"Unknown export executor: {executor_kind}")
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.spool_max_size = spool_max_size
+        self._executor: Executor
+        if executor_kind == "process":
+            # spawn: форк процесса с запущенным циклом событий и открытыми
+            # соединениями к БД небезопасен
+            self._executor = ProcessPoolExecutor(
+                max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers, thread_name_prefix="excel-export"
+            )
+        self._slots = asyncio.Semaphore(max_workers)
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def render(self, render: Callable[..., BinaryIO], *args) -> BinaryIO:
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExportPoolBusy()
+
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+        waiting = True
+        try:
+            async with self._slots:
+                self.queued -= 1
+                waiting = False
+                self.running += 1
+                try:
+                    if self.executor_kind == "process":
+                        data = await loop.run_in_executor(
+                            self._executor, _render_to_bytes,
+                            render, *args, self.spool_max_size
+                        )
+                        buffer = spool_bytes(data, self.spool_max_size)
+                    else:
+                        buffer = await loop.run_in_executor(
+                            self._executor, render, *args, self.spool_max_size
+                        )
+                finally:
+                    self.running -= 1
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if waiting:
+                self.queued -= 1
+
+        self.completed += 1
+        return buffer
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def render_export(
+        request: Request, render: Callable[..., BinaryIO], *args
+) -> BinaryIO:
+    """Строит выгрузку в пуле приложения, при переполнении очереди — 503"""
+    try:
+        return await request.app.state.export_pool.render(render, *args)
+    except ExportPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many exports in progress",
+            headers={"Retry-After": str(EXPORT_RETRY_AFTER_SECONDS)},
+        )
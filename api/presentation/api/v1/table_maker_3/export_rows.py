@@ -0,0 +1,42 @@
+from typing import NamedTuple, Optional
+
+METRIC_ARRAY_FIELDS = (
+    'metric_number', 'metric_subnumber', 'description',
+    'unit_of_measurement', 'base_level', 'average_level',
+    'goal_level', 'measurement_frequency', 'conditions',
+    'notes', 'points', 'section_id'
+)
+
+
+class MetricRow(NamedTuple):
+    """Снимок MetricDescription для передачи в пул выгрузок"""
+    metric_id: int
+    metric_number: Optional[int]
+    metric_subnumber: Optional[str]
+    description: Optional[str]
+    unit_of_measurement: Optional[str]
+    base_level: Optional[str]
+    average_level: Optional[str]
+    goal_level: Optional[str]
+    measurement_frequency: Optional[str]
+    conditions: Optional[str]
+    notes: Optional[str]
+    points: Optional[int]
+    section_id: Optional[int]
+
+    @classmethod
+    def from_model(cls, metric) -> "MetricRow":
+        return cls(*(getattr(metric, field) for field in cls._fields))
+
+    def to_array(self):
+        return [getattr(self, field) for field in METRIC_ARRAY_FIELDS]
+
+
+class SectionRow(NamedTuple):
+    """Снимок Section для передачи в пул выгрузок"""
+    id: int
+    description: Optional[str]
+
+    @classmethod
+    def from_model(cls, section) -> "SectionRow":
+        return cls(section.id, section.description)
@@ -1,55 +1,84 @@
+import functools
+import hashlib
+
 import openpyxl
 import openpyxl.styles
 
+from api.presentation.api.v1.table_maker_3.workbook_output import DEFAULT_SPOOL_MAX_SIZE, save_workbook
+
+TEMPLATE_PATH = "api/presentation/api/v1/table_maker_3/template.xltx"
+
+THIN = openpyxl.styles.Side(border_style="thin", color="000000")
+MEDIUM = openpyxl.styles.Side(border_style="medium", color="000000")
+
+# Общие объекты стилей: создаются один раз и переиспользуются всеми ячейками
+LAST_COLUMN_FILL = openpyxl.styles.PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
+FIRST_COLUMN_BORDER = openpyxl.styles.Border(top=MEDIUM, left=MEDIUM, right=THIN, bottom=MEDIUM)
+CELL_ALIGNMENT = openpyxl.styles.Alignment(wrap_text=True, horizontal='center', vertical='center')
+CATEGORY_FONT = openpyxl.styles.Font(size=4)
+
+# Границы строки по ее типу: (средние ячейки, последняя ячейка)
+ROW_BORDERS = {
+    "base": (
+        openpyxl.styles.Border(top=THIN, left=THIN, right=THIN, bottom=THIN),
+        openpyxl.styles.Border(top=THIN, left=THIN, right=MEDIUM, bottom=THIN),
+    ),
+    "category": (
+        openpyxl.styles.Border(top=MEDIUM, left=MEDIUM, right=MEDIUM, bottom=MEDIUM),
+        openpyxl.styles.Border(top=MEDIUM, left=MEDIUM, right=MEDIUM, bottom=MEDIUM),
+    ),
+    "group_start": (
+        openpyxl.styles.Border(top=MEDIUM, left=THIN, right=THIN, bottom=THIN),
+        openpyxl.styles.Border(top=MEDIUM, left=THIN, right=MEDIUM, bottom=THIN),
+    ),
+    "group_end": (
+        openpyxl.styles.Border(top=THIN, left=THIN, right=THIN, bottom=MEDIUM),
+        openpyxl.styles.Border(top=THIN, left=THIN, right=MEDIUM, bottom=MEDIUM),
+    ),
+}
+
+
+@functools.cache
+def template_digest() -> str:
+    """Хэш шаблона книги, входит в версию кэша каталога"""
+    with open(TEMPLATE_PATH, "rb") as template:
+        return hashlib.sha256(template.read()).hexdigest()
+
+
 class TableMaker3:
-    # Метод для форматирования границ таблицы
+    # Метод для форматирования границ таблицы: один проход по строкам,
+    # тип строки определяется по границам разделов и групп критериев
+    @staticmethod
     def set_border(ws, cell_range, need_to_medium, need_to_medium_up, need_to_medium_down):
-        thin = openpyxl.styles.Side(border_style="thin", color="000000")
-        medium = openpyxl.styles.Side(border_style="medium", color="000000")
+        category_rows = {int(row) for row in need_to_medium}
+        group_start_rows = {int(row) for row in need_to_medium_up}
+        group_end_rows = {int(row) for row in need_to_medium_down}
+
         for row in ws[cell_range]:
-            for cell in row:
-                if cell == row[len(row) - 1]:
-                    cell.border = openpyxl.styles.Border(top=thin, left=thin, right=medium, bottom=thin)
-                    cell.fill = openpyxl.styles.PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
-                else:
-                    cell.border = openpyxl.styles.Border(top=thin, left=thin, right=thin, bottom=thin)
-            if len(need_to_medium) != 0:
-                if row == ws[need_to_medium[0]]:
-                    for cell in row:
-                        cell.border = openpyxl.styles.Border(top=medium, left=medium, right=medium, bottom=medium)
-                    need_to_medium.pop(0)
-        
-            if len(need_to_medium_up) != 0:
-                if row == ws[need_to_medium_up[0]]:
-                    for cell in row:
-                        if cell == row[len(row) - 1]:
-                            cell.border = openpyxl.styles.Border(top=medium, left=thin, right=medium, bottom=thin)
-                        else:
-                            cell.border = openpyxl.styles.Border(top=medium, left=thin, right=thin, bottom=thin)
-                    need_to_medium_up.pop(0)
-            if len(need_to_medium_down) != 0:
-                if row == ws[need_to_medium_down[0]]:
-                    for cell in row:
-                        if cell == row[len(row) - 1]:
-                            cell.border = openpyxl.styles.Border(top=thin, left=thin, right=medium, bottom=medium)
-                        else:
-                            cell.border = openpyxl.styles.Border(top=thin, left=thin, right=thin, bottom=medium)
-
-                    need_to_medium_down.pop(0)
-            for row in ws[cell_range]:
-                for cell in row:
-                    if cell == row[0]:
-                        cell.border = openpyxl.styles.Border(top=medium, left=medium, right=thin, bottom=medium)
-                        
-                        
+            row_number = row[0].row
+            if row_number in group_end_rows:
+                kind = "group_end"
+            elif row_number in group_start_rows:
+                kind = "group_start"
+            elif row_number in category_rows:
+                kind = "category"
+            else:
+                kind = "base"
+            middle_border, last_border = ROW_BORDERS[kind]
+
+            row[0].border = FIRST_COLUMN_BORDER
+            for cell in row[1:-1]:
+                cell.border = middle_border
+            row[-1].border = last_border
+            row[-1].fill = LAST_COLUMN_FILL
 
 
     # Метод для формирования Excel таблицы
-    def make_excel(metrics, sections):
+    @staticmethod
+    def make_excel(metrics, sections, spool_max_size=DEFAULT_SPOOL_MAX_SIZE):
         # Создаем книгу и заполняем ее
-        wb = openpyxl.load_workbook("api/presentation/api/v1/table_maker_3/template.xltx")
+        wb = openpyxl.load_workbook(TEMPLATE_PATH)
         wb.template = False
-        print(metrics, sections)
         # получаем лист, с которым будем работать
         sheet = wb['Метрики']
         ws = wb.active
@@ -67,7 +96,7 @@ class TableMaker3:
                 ws.insert_rows(current_row)
                 current_category += 1
                 sheet.cell(row=current_row, column=1).value = sections[current_category - 1].description
-                sheet.cell(row=current_row, column=1).font = openpyxl.styles.Font(size=4)
+                sheet.cell(row=current_row, column=1).font = CATEGORY_FONT
                 ws.row_dimensions[current_row].height = 10
                 ws.merge_cells(start_column=1, start_row=current_row, end_column=11, end_row=current_row)
                 need_to_medium.append(str(current_row))
@@ -77,7 +106,7 @@ class TableMaker3:
             # Заполнение строк
             for col in range(len(formatted_data) - 1):
                 cell = sheet.cell(row=current_row, column=col + 1)
-                cell.alignment = openpyxl.styles.Alignment(wrap_text=True, horizontal='center', vertical='center')
+                cell.alignment = CELL_ALIGNMENT
 
                 # Пропуска записи в недоступную ячейку после слияния
                 try:
@@ -106,5 +135,5 @@ class TableMaker3:
 
         TableMaker3.set_border(ws, 'A3:K' + str(current_row - 1), need_to_medium, need_to_medium_up, need_to_medium_down)
 
-        # Сохранение файла
-        wb.save('api/infrastructure/excel/table_maker_3.xlsx')
+        # Сохранение в буфер запроса
+        return save_workbook(wb, spool_max_size)
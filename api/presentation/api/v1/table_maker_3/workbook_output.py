@@ -0,0 +1,55 @@
+import os
+import tempfile
+from typing import BinaryIO, Iterator
+
+from fastapi.responses import StreamingResponse
+
+XLSX_MEDIA_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
+DEFAULT_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def save_workbook(wb, spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE) -> BinaryIO:
+    """
+    Сохраняет книгу в буфер текущего запроса. Пока размер не превышает
+    spool_max_size, файл живет в памяти, затем переносится во временный
+    файл на диске. Общих путей вывода нет, поэтому параллельные выгрузки
+    не перезаписывают друг друга.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=spool_max_size, suffix=".xlsx")
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def spool_bytes(data: bytes, spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE) -> BinaryIO:
+    """Переносит готовое содержимое книги в такой же буфер, как save_workbook"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=spool_max_size, suffix=".xlsx")
+    buffer.write(data)
+    buffer.seek(0)
+    return buffer
+
+
+def _iter_buffer(buffer: BinaryIO) -> Iterator[bytes]:
+    try:
+        while chunk := buffer.read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        buffer.close()
+
+
+def workbook_response(buffer: BinaryIO, filename: str) -> StreamingResponse:
+    size = buffer.seek(0, os.SEEK_END)
+    buffer.seek(0)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Content-Length": str(size),
+        "Access-Control-Expose-Headers": "Content-Disposition",
+    }
+    # Синхронный итератор StreamingResponse читает в пуле потоков,
+    # поэтому чтение буфера, сброшенного на диск, не блокирует цикл событий
+    return StreamingResponse(
+        _iter_buffer(buffer), media_type=XLSX_MEDIA_TYPE, headers=headers
+    )
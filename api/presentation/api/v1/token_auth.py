@@ -0,0 +1,222 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+import jwt
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from api.config.settings import TokenAuthSettings
+from api.infrastructure.storage.sqlalchemy.models.asos_models import Employee
+from api.presentation.api.v1.reference_cache import ROLES, ReferenceCache
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+class Identity(NamedTuple):
+    employee_id: int
+    login: str
+    role_id: Optional[int]
+    role: Optional[str]
+    claims: Dict[str, Any]
+
+
+class EmployeeRow(NamedTuple):
+    employee_id: int
+    login: str
+    role_id: Optional[int]
+
+
+class ExpiringLRU:
+    """LRU ограниченного размера, у каждой записи свой срок жизни"""
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value, expires_at: float):
+        if self.max_size <= 0 or expires_at <= self._clock():
+            return
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TokenVerifier:
+    """
+    Локальная проверка токенов доступа сервиса авторизации.
+
+    Ключи подписи берутся из JWKS (PyJWKClient кэширует набор ключей на
+    jwks_cache_ttl секунд и перечитывает его при неизвестном kid) или из
+    настроек. Подпись проверяется один раз на токен: разобранные claims
+    хранятся в ExpiringLRU до exp, ключом служит sha256 токена.
+    """
+
+    def __init__(self, settings: TokenAuthSettings):
+        self.settings = settings
+        self._jwks_client = None
+        if settings.jwks_url:
+            self._jwks_client = jwt.PyJWKClient(
+                settings.jwks_url,
+                cache_keys=True,
+                lifespan=settings.jwks_cache_ttl,
+            )
+        self.claims = ExpiringLRU(settings.claims_cache_size)
+        self.rejected = 0
+
+    @property
+    def configured(self) -> bool:
+        return self._jwks_client is not None or bool(self.settings.key)
+
+    def _decode(self, token: str) -> Dict[str, Any]:
+        try:
+            if self._jwks_client is not None:
+                key = self._jwks_client.get_signing_key_from_jwt(token).key
+            else:
+                key = self.settings.key
+            return jwt.decode(
+                token,
+                key,
+                algorithms=self.settings.algorithms,
+                audience=self.settings.audience,
+                issuer=self.settings.issuer,
+                leeway=self.settings.leeway,
+                options={"require": ["exp", self.settings.identity_claim]},
+            )
+        except jwt.PyJWTError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        cache_key = hashlib.sha256(token.encode()).digest()
+        claims = self.claims.get(cache_key)
+        if claims is not None:
+            return claims
+        try:
+            # Запрос JWKS блокирующий, а проверка RSA заметна по времени
+            claims = await run_in_threadpool(self._decode, token)
+        except InvalidToken:
+            self.rejected += 1
+            raise
+        self.claims.set(cache_key, claims, claims["exp"] + self.settings.leeway)
+        return claims
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.configured,
+            "claims_cache": self.claims.stats(),
+            "rejected": self.rejected,
+        }
+
+
+class EmployeeDirectory:
+    """Сотрудник по логину из токена, кэшируется на employee_cache_ttl"""
+
+    def __init__(self, session_factory, settings: TokenAuthSettings):
+        self._session_factory = session_factory
+        self.ttl = settings.employee_cache_ttl
+        self.employees = ExpiringLRU(settings.employee_cache_size)
+
+    async def get(self, login: str) -> Optional[EmployeeRow]:
+        employee = self.employees.get(login)
+        if employee is not None:
+            return employee
+        async with self._session_factory() as session:
+            row = (await session.execute(
+                select(Employee.employee_id, Employee.login, Employee.role_id)
+                .where(Employee.login == login)
+                .limit(1)
+            )).one_or_none()
+        if row is None:
+            return None
+        employee = EmployeeRow(*row)
+        self.employees.set(login, employee, time.time() + self.ttl)
+        return employee
+
+    def stats(self) -> dict:
+        return self.employees.stats()
+
+
+async def _role_name(cache: ReferenceCache, role_id: Optional[int]) -> Optional[str]:
+    if role_id is None:
+        return None
+    for role in await cache.get(ROLES):
+        if role.role_id == role_id:
+            return role.role
+    return None
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_identity(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> Identity:
+    """
+    Зависимость для защищенных маршрутов: проверяет Bearer-токен без
+    обращения к сервису авторизации и возвращает сотрудника и его роль.
+    """
+    verifier: TokenVerifier = request.app.state.token_verifier
+    if not verifier.configured:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token verification is not configured",
+        )
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    try:
+        claims = await verifier.verify(credentials.credentials)
+    except InvalidToken:
+        raise _unauthorized("Invalid token")
+
+    login = str(claims[verifier.settings.identity_claim])
+    employee = await request.app.state.employee_directory.get(login)
+    if employee is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Employee not found",
+        )
+    role = await _role_name(request.app.state.reference_cache, employee.role_id)
+    return Identity(
+        employee.employee_id, employee.login, employee.role_id, role, claims
+    )
@@ -0,0 +1,122 @@
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+import numpy as np
+
+
+def absolute_quarter(year: int, quarter: int) -> int:
+    """Сквозной номер квартала: год * 4 + (квартал - 1)"""
+    return year * 4 + quarter - 1
+
+
+def lookback_window(duration: int, year: int, quarter: int) -> Tuple[int, int]:
+    """
+    Окно из duration кварталов, заканчивающееся целевым кварталом
+    (включительно), в сквозных номерах кварталов. Окно может переходить
+    через границу года.
+    """
+    last_quarter = absolute_quarter(year, quarter)
+    return last_quarter - max(duration, 1) + 1, last_quarter
+
+
+class WorkingDaysIndex:
+    """
+    Префиксные суммы рабочих дней по сквозным номерам кварталов.
+
+    Хранит накопленные суммы производственного календаря и рабочих дней
+    каждого сотрудника (ключ — произвольный, например
+    (employee_id, department_id)) на отрезке [first_quarter, last_quarter].
+    Сумма за любое окно кварталов считается как разность двух накопленных
+    значений. Индекс строится на запрос (см. summary_table): таблицы
+    actual_working_days* API не изменяет, их заполняют снаружи, поэтому
+    держать индекс между запросами и обновлять его по месяцам не от чего.
+    """
+
+    def __init__(self, first_quarter: int, last_quarter: int):
+        if last_quarter < first_quarter:
+            raise ValueError("last_quarter must not be less than first_quarter")
+        self.first_quarter = first_quarter
+        self.last_quarter = last_quarter
+        size = last_quarter - first_quarter + 2
+        self._calendar = np.zeros(size)
+        self._employees = np.zeros((0, size))
+        self._employee_rows: Dict[Hashable, int] = {}
+
+    @classmethod
+    def from_totals(
+            cls,
+            first_quarter: int,
+            last_quarter: int,
+            calendar_totals: Iterable[Tuple[int, int, float]],
+            employee_totals: Iterable[Tuple[Hashable, int, int, float]]
+    ) -> "WorkingDaysIndex":
+        """
+        Строит индекс из сумм по кварталам:
+          - calendar_totals: (year, quarter, days)
+          - employee_totals: (key, year, quarter, days)
+        Кварталы вне отрезка индекса пропускаются.
+        """
+        index = cls(first_quarter, last_quarter)
+
+        for year, quarter, days in calendar_totals:
+            position = index._position(year, quarter)
+            if position is not None:
+                index._calendar[position] += days
+
+        rows, positions, values = [], [], []
+        for key, year, quarter, days in employee_totals:
+            position = index._position(year, quarter)
+            if position is None:
+                continue
+            rows.append(index._employee_rows.setdefault(
+                key, len(index._employee_rows)
+            ))
+            positions.append(position)
+            values.append(days)
+
+        index._employees = np.zeros(
+            (len(index._employee_rows), index._calendar.size)
+        )
+        np.add.at(index._employees, (rows, positions), values)
+
+        np.cumsum(index._calendar, out=index._calendar)
+        np.cumsum(index._employees, axis=1, out=index._employees)
+        return index
+
+    def _position(self, year: int, quarter: int):
+        quarter_number = absolute_quarter(year, quarter)
+        if not self.first_quarter <= quarter_number <= self.last_quarter:
+            return None
+        return quarter_number - self.first_quarter + 1
+
+    def employee_keys(self) -> List[Hashable]:
+        return list(self._employee_rows)
+
+    def _bounds(self, windows: List[Tuple[int, int]]) -> tuple:
+        first = np.array([w[0] for w in windows], dtype=np.int64)
+        last = np.array([w[1] for w in windows], dtype=np.int64)
+        size = self._calendar.size
+        start = np.clip(first - self.first_quarter, 0, size - 1)
+        end = np.clip(last - self.first_quarter + 1, 0, size - 1)
+        return start, np.maximum(start, end)
+
+    def calendar_days(self, windows: List[Tuple[int, int]]) -> np.ndarray:
+        """Календарные рабочие дни за каждое окно (first, last)"""
+        start, end = self._bounds(windows)
+        return self._calendar[end] - self._calendar[start]
+
+    def employee_days(
+            self, keys: List[Hashable], windows: List[Tuple[int, int]]
+    ) -> np.ndarray:
+        """Рабочие дни сотрудников за каждое окно: матрица (keys, windows)"""
+        start, end = self._bounds(windows)
+        result = np.zeros((len(keys), len(windows)))
+        known = [
+            (i, self._employee_rows[key])
+            for i, key in enumerate(keys)
+            if key in self._employee_rows
+        ]
+        if known:
+            positions, rows = zip(*known)
+            cumulative = self._employees[list(rows)]
+            result[list(positions)] = cumulative[:, end] - cumulative[:, start]
+        return result
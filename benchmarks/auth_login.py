@@ -0,0 +1,129 @@
+"""
+Нагрузочная проверка входа /auth/auth в одном воркере, без БД.
+
+Показывает пропускную способность входа на воркер и задержку легкого
+запроса (/ping), который выполняется одновременно с потоком входов:
+  - inline  — bcrypt считается прямо в цикле событий (старый вариант);
+  - offload — verify_password из auth.py, bcrypt в отдельных потоках.
+
+Запуск из корня репозитория:
+    python -m benchmarks.auth_login --logins 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1 import auth
+
+LOGIN = "bench"
+PASSWORD = "bench-password"
+PING_INTERVAL = 0.01
+
+
+class FakeResult:
+    def __init__(self, row):
+        self._row = row
+
+    def one_or_none(self):
+        return self._row
+
+
+class FakeSession:
+    """Отвечает на запрос сотрудника по логину без обращения к БД"""
+
+    def __init__(self, password_hash: str):
+        self._row = SimpleNamespace(employee_id=1, password=password_hash)
+
+    async def execute(self, query):
+        return FakeResult(self._row)
+
+
+def make_app(password_hash: str, mode: str) -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+
+    async def fake_session():
+        yield FakeSession(password_hash)
+
+    app.dependency_overrides[get_async_session] = fake_session
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "OK"}
+
+    if mode == "inline":
+        async def verify_inline(password, password_hash):
+            return auth._verify(password, password_hash)
+
+        auth.verify_password = verify_inline
+    return app
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(mode: str, logins: int, concurrency: int, password_hash: str):
+    original = auth.verify_password
+    app = make_app(password_hash, mode)
+    transport = httpx.ASGITransport(app=app)
+    params = {"login": LOGIN, "password": PASSWORD}
+    ping_latencies = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def login():
+                async with semaphore:
+                    response = await client.get("/auth/auth", params=params)
+                    assert response.json()["status"] == "OK", response.text
+
+            async def pinger(done: asyncio.Event):
+                # Задержка считается от запланированного момента запроса:
+                # если цикл событий занят bcrypt, ожидание попадает в замер
+                scheduled = time.perf_counter()
+                while not done.is_set():
+                    await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                    await client.get("/ping")
+                    ping_latencies.append(time.perf_counter() - scheduled)
+                    scheduled = max(scheduled + PING_INTERVAL, time.perf_counter())
+
+            done = asyncio.Event()
+            ping_task = asyncio.create_task(pinger(done))
+            started = time.perf_counter()
+            await asyncio.gather(*(login() for _ in range(logins)))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await ping_task
+    finally:
+        auth.verify_password = original
+
+    sys.stdout.write(
+        f"{mode:8} logins/s={logins / elapsed:7.1f} "
+        f"ping p50={statistics.median(ping_latencies) * 1000:7.1f}ms "
+        f"p99={percentile(ping_latencies, 0.99) * 1000:7.1f}ms "
+        f"max={max(ping_latencies) * 1000:7.1f}ms\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    password_hash = auth.pwd_context.hash(PASSWORD)
+    for mode in ("inline", "offload"):
+        asyncio.run(run(mode, args.logins, args.concurrency, password_hash))
+
+
+if __name__ == "__main__":
+    main()
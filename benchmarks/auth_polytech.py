@@ -0,0 +1,126 @@
+"""
+Клиент сервиса авторизации Политеха на локальной замене сервиса
+(fake_auth_server), без выхода в сеть.
+
+  throughput — /auth_polytech/verify с общим клиентом воркера против
+               нового клиента на каждый запрос: запросы в секунду и
+               число открытых TCP-соединений;
+  failover   — сервис перестает отвечать: сколько запросов дошло до
+               него до размыкания цепи, как быстро отклоняются
+               остальные и восстанавливается ли цепь после ответа.
+
+Запуск из корня репозитория:
+    python -m benchmarks.auth_polytech --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from api.config.settings import AuthApiSettings
+from api.presentation.api.v1 import auth_polytech
+from api.presentation.api.v1.auth_api_client import AuthApiClient
+from benchmarks.fake_auth_server import VALID_CODE, serve_fake_auth
+
+PAYLOAD = {"login": "bench", "code": VALID_CODE}
+
+
+def make_app(settings: AuthApiSettings, shared: bool) -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth_polytech.router)
+    app.state.auth_api_client = AuthApiClient(settings)
+    if not shared:
+        # Прежнее поведение: новый клиент и соединение на каждый запрос
+        async def client_per_request():
+            client = AuthApiClient(settings)
+            try:
+                yield client
+            finally:
+                await client.aclose()
+
+        app.dependency_overrides[auth_polytech.get_auth_client] = client_per_request
+    return app
+
+
+async def fire(app: FastAPI, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, codes = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/auth_polytech/verify", json=PAYLOAD)
+                latencies.append(time.perf_counter() - started)
+                codes.append(response.status_code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies, codes
+
+
+def report(line: str):
+    sys.stdout.write(line + "\n")
+
+
+async def throughput(total: int, concurrency: int):
+    for shared in (False, True):
+        with serve_fake_auth() as server:
+            settings = AuthApiSettings()
+            settings.url = server.url
+            app = make_app(settings, shared)
+            elapsed, latencies, codes = await fire(app, total, concurrency)
+            await app.state.auth_api_client.aclose()
+            assert set(codes) == {200}, set(codes)
+            report(
+                f"{'shared' if shared else 'per-request':12} "
+                f"req/s={total / elapsed:7.1f} "
+                f"p50={statistics.median(latencies) * 1000:6.1f}ms "
+                f"connections={len(server.state.connections)}"
+            )
+
+
+async def failover(concurrency: int):
+    with serve_fake_auth() as server:
+        settings = AuthApiSettings()
+        settings.url = server.url
+        settings.read_timeout = 0.5
+        settings.breaker_failures = 5
+        settings.breaker_reset = 1.0
+        app = make_app(settings, shared=True)
+        client = app.state.auth_api_client
+
+        server.state.mode = "hang"
+        server.state.hang_seconds = 2
+        elapsed, latencies, codes = await fire(app, 100, concurrency)
+        fast = [latency for latency in latencies if latency < settings.read_timeout]
+        report(
+            f"hang         total={elapsed:5.2f}s upstream={server.state.requests} "
+            f"rejected={client.rejected} fast_503={len(fast)} "
+            f"p50={statistics.median(latencies) * 1000:6.1f}ms state={client.breaker.state}"
+        )
+
+        server.state.mode = "ok"
+        await asyncio.sleep(settings.breaker_reset)
+        _, _, codes = await fire(app, 10, 1)
+        report(f"recovered    codes={sorted(set(codes))} state={client.breaker.state}")
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(throughput(args.requests, args.concurrency))
+    asyncio.run(failover(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Локальная замена сервиса авторизации Политеха (admin.kd.mospolytech.ru).
+
+Повторяет ответы /login и /verification_auth_code, умеет добавлять
+задержку и отказывать (503 или зависание дольше таймаута клиента),
+считает запросы и TCP-соединения. Запускается в том же процессе:
+
+    with serve_fake_auth() as server:
+        settings.url = server.url
+        server.state.mode = "error"
+"""
+import asyncio
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Set, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+API_PREFIX = "/api/v1/users"
+VALID_CODE = 123456
+
+
+@dataclass
+class FakeAuthState:
+    # ok — обычные ответы, error — 503, hang — ответ через hang_seconds
+    mode: str = "ok"
+    latency: float = 0.0
+    hang_seconds: float = 30.0
+    requests: int = 0
+    connections: Set[Tuple[str, int]] = field(default_factory=set)
+
+
+def make_fake_auth_app(state: FakeAuthState) -> FastAPI:
+    app = FastAPI()
+
+    async def respond(request: Request, body: dict):
+        state.requests += 1
+        state.connections.add((request.client.host, request.client.port))
+        if state.latency:
+            await asyncio.sleep(state.latency)
+        if state.mode == "error":
+            return JSONResponse({"detail": "unavailable"}, status_code=503)
+        if state.mode == "hang":
+            await asyncio.sleep(state.hang_seconds)
+        return body
+
+    @app.post(f"{API_PREFIX}/login")
+    async def login(request: Request):
+        return await respond(request, {"status": "code sent"})
+
+    @app.post(f"{API_PREFIX}/verification_auth_code")
+    async def verify(request: Request):
+        payload = await request.json()
+        if payload.get("code") != VALID_CODE:
+            state.requests += 1
+            return JSONResponse({"detail": "wrong code"}, status_code=400)
+        return await respond(request, {
+            "user_id": payload["login"],
+            "access_token": "access",
+            "refresh_token": "refresh",
+        })
+
+    return app
+
+
+class FakeAuthServer:
+    def __init__(self, state: FakeAuthState, server: uvicorn.Server, port: int):
+        self.state = state
+        self.server = server
+        self.url = f"http://127.0.0.1:{port}{API_PREFIX}"
+
+
+@contextmanager
+def serve_fake_auth(state: FakeAuthState = None) -> Iterator[FakeAuthServer]:
+    """Поднимает сервер на свободном порту 127.0.0.1 в отдельном потоке"""
+    state = state or FakeAuthState()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+
+    config = uvicorn.Config(
+        make_fake_auth_app(state), log_level="warning", lifespan="off"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(
+        target=server.run, kwargs={"sockets": [sock]}, daemon=True
+    )
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield FakeAuthServer(state, server, port)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        sock.close()
@@ -0,0 +1,337 @@
+"""
+Планы и время горячих фильтров по таблицам KPI до и после индексов
+миграции eef1bf39dc10.
+
+  after  — запросы на текущей схеме;
+  before — те же запросы в транзакции, где индексы миграции удалены
+           через DROP INDEX; транзакция откатывается, индексы остаются.
+
+Для каждого запроса печатается EXPLAIN (ANALYZE, BUFFERS) и медиана/p95
+по --rounds выполнениям. DROP INDEX до отката держит ACCESS EXCLUSIVE
+на таблицах, поэтому режим before (--compare) запускать на копии БД,
+а не на рабочей базе. Параметры, не заданные в командной строке,
+берутся из последних строк departments_metrics и
+actual_working_days_on_employee.
+
+--seed N в той же транзакции заполняет таблицы KPI синтетическими
+данными через generate_series: N строк departments_metrics и
+actual_working_days_on_employee, N / 10 строк employees_to_metrics,
+календарь actual_working_days и связанные справочники. Идентификаторы
+берутся выше существующих, после вставки выполняется ANALYZE. Все
+откатывается вместе с замером, поэтому сравнение воспроизводится и на
+пустой базе.
+
+Подключение — из переменных POSTGRES_* (PostgresSettings).
+
+Запуск из корня репозитория:
+    python -m benchmarks.kpi_indexes --rounds 50 --seed 200000 --compare
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from api.config.settings import PostgresSettings
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), os.pardir,
+    "api", "infrastructure", "storage", "sqlalchemy", "alembic", "versions",
+    "eef1bf39dc10_kpi_tables_indexes.py",
+)
+
+# (название, запрос) — фильтры маршрутов, под которые созданы индексы
+QUERIES = [
+    (
+        "departments_metrics by department",
+        "SELECT metrics_id, value FROM departments_metrics "
+        "WHERE department_id = :department_id AND year = :year "
+        "AND quarter = :quarter",
+    ),
+    (
+        "departments_metrics by author",
+        "SELECT value FROM departments_metrics "
+        "WHERE author_id = :author_id AND metrics_id = :metric_id "
+        "AND year = :year AND quarter = :quarter",
+    ),
+    (
+        "working days of employee",
+        "SELECT year, quarter, sum(count_day) "
+        "FROM actual_working_days_on_employee "
+        "WHERE employee_id = :employee_id AND department_id = :department_id "
+        "AND year IN (:year - 1, :year) GROUP BY year, quarter",
+    ),
+    (
+        "working days of department",
+        "SELECT employee_id, sum(count_day) "
+        "FROM actual_working_days_on_employee "
+        "WHERE department_id = :department_id AND year = :year "
+        "AND quarter = :quarter GROUP BY employee_id",
+    ),
+    (
+        "calendar working days",
+        "SELECT year, quarter, sum(count_day) FROM actual_working_days "
+        "WHERE year IN (:year - 1, :year) GROUP BY year, quarter",
+    ),
+    (
+        "employees_to_metrics by employee",
+        "SELECT metrics_id FROM employees_to_metrics "
+        "WHERE employee_id = :employee_id AND year = :year "
+        "AND quarter = :quarter",
+    ),
+    (
+        "employees_to_metrics by metric",
+        "SELECT employee_id FROM employees_to_metrics "
+        "WHERE metrics_id @> ARRAY[CAST(:metric_id AS integer)]",
+    ),
+    (
+        "metrics_in_quartal by quarter",
+        "SELECT metrics_id, duration FROM metrics_in_quartal "
+        "WHERE quartal = :quarter ORDER BY id LIMIT 1",
+    ),
+    (
+        "metrics_in_quartal by metric",
+        "SELECT quartal FROM metrics_in_quartal "
+        "WHERE metrics_id @> ARRAY[CAST(:metric_id AS integer)]",
+    ),
+    (
+        "active metric descriptions",
+        "SELECT metric_id FROM metric_descriptions WHERE is_active "
+        "ORDER BY section_id, metric_number, metric_subnumber",
+    ),
+]
+
+
+SEED_FIRST_YEAR = 2020
+SEED_YEARS = 6
+SEED_METRICS = 200
+SEED_DEPARTMENTS = 50
+
+# (таблица, ключ, INSERT) — идентификаторы от {<таблица>_base} + 1;
+# в departments_metrics номер строки k раскладывается по quarter, year,
+# metric, department и author, чтобы не нарушить естественный ключ
+SEED = [
+    (
+        "employees", "employee_id",
+        "INSERT INTO employees (employee_id, login) "
+        "SELECT {employees_base} + g, 'seed' || g "
+        "FROM generate_series(1, {employees}) g",
+    ),
+    (
+        "departments", "id",
+        "INSERT INTO departments (id, name_of_department) "
+        "SELECT {departments_base} + g, 'seed ' || g "
+        "FROM generate_series(1, {departments}) g",
+    ),
+    (
+        "metric_descriptions", "metric_id",
+        "INSERT INTO metric_descriptions "
+        "(metric_id, metric_number, metric_subnumber, is_active) "
+        "SELECT {metric_descriptions_base} + g, g, NULL, g % 10 <> 0 "
+        "FROM generate_series(1, {metrics}) g",
+    ),
+    (
+        "metrics_in_quartal", "id",
+        "INSERT INTO metrics_in_quartal (id, quartal, metrics_id, duration) "
+        "SELECT {metrics_in_quartal_base} + q, q, "
+        "ARRAY(SELECT {metric_descriptions_base} + m "
+        "FROM generate_series(1, {metrics}) m), "
+        "ARRAY(SELECT 1 + m % 4 FROM generate_series(1, {metrics}) m) "
+        "FROM generate_series(1, 4) q",
+    ),
+    (
+        "actual_working_days", "id",
+        "INSERT INTO actual_working_days (id, year, month, count_day, quarter) "
+        "SELECT {actual_working_days_base} + g, "
+        "{first_year} + (g - 1) / 12, (g - 1) % 12 + 1, 20, "
+        "(g - 1) % 12 / 3 + 1 "
+        "FROM generate_series(1, {years} * 12) g",
+    ),
+    (
+        "actual_working_days_on_employee", "id",
+        "INSERT INTO actual_working_days_on_employee "
+        "(id, employee_id, jobtitle, year, month, count_day, quarter, "
+        "department_id) "
+        "SELECT {actual_working_days_on_employee_base} + k + 1, "
+        "{employees_base} + 1 + employee, "
+        "CASE WHEN k % 10 = 0 THEN 'ИО' ELSE 'Доцент' END, "
+        "{first_year} + k / 12 % {years}, k % 12 + 1, 18, k % 12 / 3 + 1, "
+        "{departments_base} + 1 + employee % {departments} "
+        "FROM (SELECT g - 1 AS k, (g - 1) / ({years} * 12) % {employees} "
+        "AS employee FROM generate_series(1, {rows}) g) s",
+    ),
+    (
+        "departments_metrics", "id",
+        "INSERT INTO departments_metrics (id, department_id, value, year, "
+        "quarter, period_date, metrics_id, author_id, status) "
+        "SELECT {departments_metrics_base} + k + 1, "
+        "{departments_base} + 1 "
+        "+ k / (4 * {years} * {metrics}) % {departments}, "
+        "k % 100, {first_year} + k / 4 % {years}, k % 4 + 1, "
+        "make_date({first_year} + k / 4 % {years}, (k % 4 + 1) * 3, 1), "
+        "{metric_descriptions_base} + 1 + k / (4 * {years}) % {metrics}, "
+        "{employees_base} + 1 + k / (4 * {years} * {metrics} * {departments}), "
+        "1 "
+        "FROM (SELECT g - 1 AS k FROM generate_series(1, {rows}) g) s",
+    ),
+    (
+        "employees_to_metrics", "id",
+        "INSERT INTO employees_to_metrics "
+        "(id, metrics_id, year, quarter, employee_id) "
+        "SELECT {employees_to_metrics_base} + k + 1, "
+        "ARRAY[{metric_descriptions_base} + 1 + k % {metrics}, "
+        "{metric_descriptions_base} + 1 + (k + 1) % {metrics}, "
+        "{metric_descriptions_base} + 1 + (k + 2) % {metrics}], "
+        "{first_year} + k / 4 % {years}, k % 4 + 1, "
+        "{employees_base} + 1 + k / (4 * {years}) % {employees} "
+        "FROM (SELECT g - 1 AS k FROM generate_series(1, {rows} / 10) g) s",
+    ),
+]
+
+
+async def seed(conn: AsyncConnection, rows: int):
+    sizes = {
+        "rows": rows,
+        "first_year": SEED_FIRST_YEAR,
+        "years": SEED_YEARS,
+        "metrics": SEED_METRICS,
+        "departments": SEED_DEPARTMENTS,
+        # у каждого сотрудника полный календарь, авторов хватает
+        # на все строки departments_metrics
+        "employees": max(
+            100,
+            rows // (SEED_YEARS * 12) + 1,
+            rows // (4 * SEED_YEARS * SEED_METRICS * SEED_DEPARTMENTS) + 1,
+        ),
+    }
+    for table, key, _ in SEED:
+        sizes[f"{table}_base"] = (await conn.execute(text(
+            f"SELECT coalesce(max({key}), 0) FROM {table}"
+        ))).scalar_one()
+    for table, _, sql in SEED:
+        started = time.perf_counter()
+        result = await conn.execute(text(sql.format(**sizes)))
+        sys.stdout.write(
+            f"seed {table}: {result.rowcount} rows "
+            f"in {time.perf_counter() - started:.1f}s\n"
+        )
+    for table, _, _ in SEED:
+        await conn.execute(text(f"ANALYZE {table}"))
+    sys.stdout.write("\n")
+
+
+def migration_indexes() -> List[str]:
+    spec = importlib.util.spec_from_file_location("kpi_indexes_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return [name for name, _, _, _ in module.INDEXES]
+
+
+async def sample_params(conn: AsyncConnection, args) -> Dict[str, int]:
+    metric = (await conn.execute(text(
+        "SELECT department_id, author_id, metrics_id, year, quarter "
+        "FROM departments_metrics ORDER BY id DESC LIMIT 1"
+    ))).one_or_none()
+    employee = (await conn.execute(text(
+        "SELECT employee_id, department_id FROM actual_working_days_on_employee "
+        "ORDER BY id DESC LIMIT 1"
+    ))).one_or_none()
+
+    def pick(value, row, attr):
+        if value is not None:
+            return value
+        if row is None or getattr(row, attr) is None:
+            raise SystemExit(f"no sample for {attr}, pass it explicitly")
+        return getattr(row, attr)
+
+    return {
+        "department_id": pick(args.department_id, metric, "department_id"),
+        "author_id": pick(args.author_id, metric, "author_id"),
+        "metric_id": pick(args.metric_id, metric, "metrics_id"),
+        "year": pick(args.year, metric, "year"),
+        "quarter": pick(args.quarter, metric, "quarter"),
+        "employee_id": pick(args.employee_id, employee, "employee_id"),
+    }
+
+
+async def measure(conn: AsyncConnection, sql: str, params: dict, rounds: int):
+    statement = text(sql)
+    plan = await conn.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params
+    )
+    plan = "\n".join("    " + line for line, in plan)
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        (await conn.execute(statement, params)).all()
+        timings.append(time.perf_counter() - started)
+    p95 = statistics.quantiles(timings, n=20)[-1] if rounds > 1 else timings[0]
+    return plan, statistics.median(timings), p95
+
+
+async def run_variant(conn: AsyncConnection, variant: str, params: dict, rounds: int):
+    results = {}
+    for name, sql in QUERIES:
+        plan, median, p95 = await measure(conn, sql, params, rounds)
+        results[name] = (median, p95)
+        sys.stdout.write(
+            f"[{variant}] {name}: median {median * 1000:.2f}ms "
+            f"p95 {p95 * 1000:.2f}ms\n{plan}\n\n"
+        )
+    return results
+
+
+async def run(args):
+    engine = create_async_engine(PostgresSettings().url)
+    try:
+        # Заполнение, замеры и удаление индексов — одна транзакция,
+        # которая откатывается
+        async with engine.connect() as conn:
+            if args.seed:
+                await seed(conn, args.seed)
+            params = await sample_params(conn, args)
+            sys.stdout.write(f"params: {params}\n\n")
+            after = await run_variant(conn, "after", params, args.rounds)
+
+            if not args.compare:
+                await conn.rollback()
+                return
+            for name in migration_indexes():
+                await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            before = await run_variant(conn, "before", params, args.rounds)
+            await conn.rollback()
+
+        sys.stdout.write("median, before -> after\n")
+        for name, _ in QUERIES:
+            sys.stdout.write(
+                f"  {name:36} {before[name][0] * 1000:8.2f}ms -> "
+                f"{after[name][0] * 1000:8.2f}ms\n"
+            )
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--compare", action="store_true",
+                        help="также замерить без индексов миграции (на копии БД)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="заполнить таблицы N синтетическими строками")
+    parser.add_argument("--year", type=int)
+    parser.add_argument("--quarter", type=int)
+    parser.add_argument("--department-id", type=int)
+    parser.add_argument("--employee-id", type=int)
+    parser.add_argument("--author-id", type=int)
+    parser.add_argument("--metric-id", type=int)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Задержка запроса при разных уровнях логирования.
+
+  before — logging.basicConfig: StreamHandler пишет каждую запись прямо
+           в потоке обработки запроса;
+  after  — setup_logging: очередь, QueueListener, ротация файлов и
+           выборка записей sqlalchemy.engine.
+
+Маршрут пишет одну запись INFO и, как SQLAlchemy при включенном логе
+движка, по запросу к БД: текст запроса (INFO), параметры (INFO) и
+строки результата (DEBUG). Вывод логов уходит во временный каталог.
+
+Запуск из корня репозитория:
+    python -m benchmarks.logging_pipeline --requests 5000
+"""
+import argparse
+import asyncio
+import atexit
+import logging
+import statistics
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI
+
+from api.config.logger import setup_logging
+from api.config.settings import LoggingSettings
+from benchmarks.middleware import call
+
+QUERIES_PER_REQUEST = 3
+ROWS_PER_QUERY = 5
+
+app_logger = logging.getLogger("api.presentation.api.v1.bench")
+sql_logger = logging.getLogger("sqlalchemy.engine.Engine")
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        app_logger.info("ping from %s", "bench")
+        for query in range(QUERIES_PER_REQUEST):
+            sql_logger.info("SELECT roles.role_id, roles.role FROM roles WHERE roles.role_id = $1::INTEGER")
+            sql_logger.info("[cached since %.4gs ago] %r", 12.5, (query,))
+            for row in range(ROWS_PER_QUERY):
+                sql_logger.debug("Row %r", (row, "expert"))
+        return {"status": "OK"}
+
+    return app
+
+
+def reset_logging():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    for name in ("sqlalchemy.engine", "sqlalchemy.engine.Engine"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+
+async def measure(total: int):
+    app = make_app()
+    latencies = []
+    for _ in range(total):
+        started = time.perf_counter()
+        await call(app)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run(pipeline: str, level: str, total: int, log_dir: str):
+    reset_logging()
+    listener = None
+    log_file = open(f"{log_dir}/{pipeline}-{level}.out", "w")
+    stdout, sys.stdout = sys.stdout, log_file
+    try:
+        if pipeline == "before":
+            logging.basicConfig(level=level, stream=log_file)
+        else:
+            settings = LoggingSettings()
+            settings.level = level
+            settings.levels = {}
+            settings.dir = f"{log_dir}/{pipeline}-{level}"
+            listener = setup_logging(settings)
+        started = time.perf_counter()
+        latencies = asyncio.run(measure(total))
+        served = time.perf_counter() - started
+        if listener is not None:
+            atexit.unregister(listener.stop)
+            listener.stop()
+        drained = time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+        reset_logging()
+        log_file.close()
+
+    sys.stdout.write(
+        f"{pipeline:6} {level:5} p50={statistics.median(latencies) * 1e6:7.1f}us "
+        f"p99={sorted(latencies)[int(len(latencies) * 0.99)] * 1e6:7.1f}us "
+        f"served={served:5.2f}s written={drained:5.2f}s\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        for pipeline in ("before", "after"):
+            for level in ("INFO", "DEBUG"):
+                run(pipeline, level, args.requests, log_dir)
+
+
+if __name__ == "__main__":
+    main()
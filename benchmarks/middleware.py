@@ -0,0 +1,133 @@
+"""
+Накладные расходы слоя middleware на тривиальном маршруте.
+
+  before — прежний стек: CORSMiddleware из create_app, error_header через
+           BaseHTTPMiddleware и второй CORSMiddleware;
+  after  — setup_middleware: ErrorResponseMiddleware (чистый ASGI) и один
+           CORSMiddleware.
+
+Приложение вызывается напрямую через ASGI, без сети и HTTP-клиента,
+чтобы в замер попадали только маршрут и middleware.
+
+Запуск из корня репозитория:
+    python -m benchmarks.middleware --requests 20000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from api.presentation.api.middlewares import setup_middleware
+from api.presentation.api.v1.dto import HTTPException
+
+SETTINGS = SimpleNamespace(cors_allow_origins=["*"], client_domain="127.0.0.1:3000")
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/ping",
+    "raw_path": b"/ping",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [(b"host", b"bench"), (b"origin", b"http://127.0.0.1:3000")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("bench", 80),
+}
+
+
+async def error_header(request, call_next):
+    # Прежняя реализация из middlewares.py
+    err_content = None
+    try:
+        response = await call_next(request)
+    except Exception:
+        err_content = "error"
+    if err_content is not None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid request",
+                errors=err_content,
+            ).model_dump(),
+        )
+    return response
+
+
+def make_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "OK"}
+
+    if stack == "before":
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=SETTINGS.cors_allow_origins,
+            allow_credentials=True,
+            allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
+            allow_headers=["*"],
+        )
+        app.add_middleware(BaseHTTPMiddleware, dispatch=error_header)
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*", "http://" + SETTINGS.client_domain],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    elif stack == "after":
+        setup_middleware(app, SETTINGS)
+    return app
+
+
+async def call(app: FastAPI) -> int:
+    code = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal code
+        if message["type"] == "http.response.start":
+            code = message["status"]
+
+    await app(dict(SCOPE), receive, send)
+    return code
+
+
+async def run(stack: str, total: int, concurrency: int):
+    app = make_app(stack)
+    assert await call(app) == 200
+    started = time.perf_counter()
+    for _ in range(total // concurrency):
+        await asyncio.gather(*(call(app) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done = total // concurrency * concurrency
+    sys.stdout.write(
+        f"{stack:6} concurrency={concurrency:<3} req/s={done / elapsed:9.0f} "
+        f"per request={elapsed / done * 1e6:6.1f}us\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    for concurrency in (1, 50):
+        for stack in ("none", "before", "after"):
+            asyncio.run(run(stack, args.requests, concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Время сериализации ответа на 10 тыс. строк из БД.
+
+  before          — маршрут возвращает словари, FastAPI проверяет их
+                    через response_model и кодирует stdlib json;
+  orjson          — то же, но default_response_class=ORJSONResponse;
+  model_construct — модели без проверки, model_dump и orjson (только
+                    для плоских строк: вложенные модели model_construct
+                    не строит);
+  trusted         — маршруты приложения: готовые словари сразу в
+                    ORJSONResponse (responses.trusted_response).
+
+Сессия БД подменяется, строки генерируются заранее: в замер попадают
+маршрут, проверка и кодирование ответа.
+
+Запуск из корня репозитория:
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import date
+from typing import List
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import ORJSONResponse
+
+from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1 import departments_metrics, employees_to_scores
+from api.presentation.api.v1.departments_metrics import DepartmentsMetricsResponse
+from api.presentation.api.v1.employees_to_scores import EmployeesMetricsResponse
+from benchmarks.middleware import SCOPE
+
+GroupRow = namedtuple(
+    "GroupRow", "employee_id year quarter metrics_ids scores"
+)
+
+ROUNDS = 5
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def mappings(self):
+        return self._rows
+
+    def all(self):
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def execute(self, query):
+        return FakeResult(self._rows)
+
+
+def department_metric_rows(count: int) -> List[dict]:
+    return [
+        {
+            "id": i, "department_id": i % 40, "metrics_id": i % 90,
+            "value": i % 100, "year": 2025, "quarter": i % 4 + 1,
+            "period_date": date(2025, 3, 31), "author_id": i % 7,
+            "status": 1,
+        }
+        for i in range(count)
+    ]
+
+
+def group_rows(count: int) -> List[GroupRow]:
+    return [
+        GroupRow(i, 2025, i % 4 + 1, list(range(10)), [i % 100] * 10)
+        for i in range(count)
+    ]
+
+
+def make_app(variant: str, rows, grouped: bool) -> FastAPI:
+    response_model = EmployeesMetricsResponse if grouped else DepartmentsMetricsResponse
+    if grouped:
+        content = [employees_to_scores.group_to_response(row) for row in rows]
+    else:
+        content = [dict(row) for row in rows]
+
+    if variant == "trusted":
+        app = FastAPI()
+        app.include_router(employees_to_scores.router if grouped else departments_metrics.router)
+        app.dependency_overrides[get_async_session] = lambda: FakeSession(rows)
+        return app
+
+    app = FastAPI() if variant == "before" else FastAPI(
+        default_response_class=ORJSONResponse
+    )
+    router = APIRouter()
+
+    if variant == "model_construct":
+        @router.get("/rows", response_model=List[response_model])
+        async def constructed():
+            return ORJSONResponse([
+                response_model.model_construct(**item).model_dump(mode="json")
+                for item in content
+            ])
+    else:
+        @router.get("/rows", response_model=List[response_model])
+        async def validated():
+            return content
+
+    app.include_router(router)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> int:
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(
+        dict(SCOPE, path=path, raw_path=path.encode(), query_string=b"limit=1000"),
+        receive,
+        send,
+    )
+    return size
+
+
+async def run(variant: str, rows, grouped: bool, path: str):
+    app = make_app(variant, rows, grouped)
+    target = path if variant == "trusted" else "/rows"
+    size = await call(app, target)
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        await call(app, target)
+        timings.append(time.perf_counter() - started)
+    sys.stdout.write(
+        f"{'grouped' if grouped else 'flat':7} {variant:15} "
+        f"{statistics.median(timings) * 1000:7.1f}ms  {size / 1024:7.0f}KiB\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    cases = (
+        (False, department_metric_rows(args.rows), "/departments-metrics"),
+        (True, group_rows(args.rows), "/employees_metrics/all"),
+    )
+    for grouped, rows, path in cases:
+        for variant in ("before", "orjson", "model_construct", "trusted"):
+            if grouped and variant == "model_construct":
+                continue
+            asyncio.run(run(variant, rows, grouped, path))
+
+
+if __name__ == "__main__":
+    main()
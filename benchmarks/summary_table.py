@@ -0,0 +1,142 @@
+"""
+Задержка /summary_table/metrics и число обращений к БД на запрос.
+
+Сессия БД подменяется: каждый execute считается и ждет --latency мс,
+имитируя сетевой круг до Postgres, и отдает заранее построенные строки
+в порядке запросов маршрута (метрики квартала, затем рабочие дни).
+Маршрут должен обходиться не более чем двумя обращениями.
+
+Запуск из корня репозитория:
+    python -m benchmarks.summary_table --requests 2000 --latency 1
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import namedtuple
+from typing import List
+
+from fastapi import FastAPI
+
+from api.infrastructure.storage.sqlalchemy.session_maker import get_async_session
+from api.presentation.api.v1 import summary_table
+from benchmarks.middleware import SCOPE
+from benchmarks.serialization import FakeResult
+
+MetricRow = namedtuple(
+    "MetricRow", "metric_id duration metric_number metric_subnumber value"
+)
+DaysRow = namedtuple("DaysRow", "employee_id department_id year quarter days")
+
+YEAR = 2025
+QUARTER = 2
+EMPLOYEE_ID = 1
+DEPARTMENT_ID = 1
+MAX_ROUND_TRIPS = 2
+QUERY = (
+    f"quarter={QUARTER}&year={YEAR}"
+    f"&employee_id={EMPLOYEE_ID}&department_id={DEPARTMENT_ID}"
+).encode()
+PATH = "/summary_table/metrics"
+
+
+class CountingSession:
+    """Отдает results по очереди и считает обращения"""
+
+    def __init__(self, results: List[list], latency: float):
+        self._results = results
+        self._latency = latency
+        self.executes = 0
+
+    async def execute(self, query):
+        rows = self._results[min(self.executes, len(self._results) - 1)]
+        self.executes += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return FakeResult(rows)
+
+
+def metric_rows(count: int) -> List[MetricRow]:
+    return [
+        MetricRow(i, i % 4 + 1, i // 3 + 1, "аб"[i % 2] if i % 3 else None, i % 50)
+        for i in range(count)
+    ]
+
+
+def days_rows() -> List[DaysRow]:
+    rows = []
+    for year in (YEAR - 1, YEAR):
+        for quarter in range(1, 5):
+            rows.append(DaysRow(None, None, year, quarter, 62))
+            rows.append(DaysRow(EMPLOYEE_ID, DEPARTMENT_ID, year, quarter, 55))
+    return rows
+
+
+def make_app(results: List[list], latency: float, sessions: list) -> FastAPI:
+    app = FastAPI()
+    app.include_router(summary_table.router, prefix="/summary_table")
+
+    def session():
+        fake = CountingSession(results, latency)
+        sessions.append(fake)
+        return fake
+
+    app.dependency_overrides[get_async_session] = session
+    return app
+
+
+async def call(app: FastAPI) -> int:
+    status_code = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(
+        dict(SCOPE, path=PATH, raw_path=PATH.encode(), query_string=QUERY),
+        receive,
+        send,
+    )
+    return status_code
+
+
+async def run(requests: int, metrics: int, latency: float):
+    sessions = []
+    app = make_app([metric_rows(metrics), days_rows()], latency, sessions)
+    if await call(app) != 200:
+        raise SystemExit("route failed")
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await call(app)
+        timings.append(time.perf_counter() - started)
+
+    round_trips = max(session.executes for session in sessions)
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    sys.stdout.write(
+        f"metrics={metrics:4} latency={latency * 1000:4.1f}ms  "
+        f"p50 {statistics.median(timings) * 1000:6.2f}ms  "
+        f"p95 {p95 * 1000:6.2f}ms  round trips {round_trips}\n"
+    )
+    if round_trips > MAX_ROUND_TRIPS:
+        raise SystemExit(f"expected at most {MAX_ROUND_TRIPS} round trips")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--metrics", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=1.0, help="мс на execute")
+    args = parser.parse_args()
+
+    for latency in (0.0, args.latency / 1000):
+        asyncio.run(run(args.requests, args.metrics, latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Время построения книги каталога метрик TableMaker3.make_excel на
+синтетическом каталоге из 100, 500 и 2000 метрик.
+
+Метрики разбиты на разделы по 40 штук, часть номеров — группы из
+нескольких подпунктов, как в реальном каталоге. Если время растет
+линейно, время на одну метрику почти не зависит от размера каталога.
+
+Линейный рост проверяет tests/test_table_maker.py (отметка slow),
+этот скрипт только печатает замеры.
+
+Запуск из корня репозитория:
+    python -m benchmarks.table_maker
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+from api.presentation.api.v1.table_maker_3.export_rows import MetricRow, SectionRow
+from api.presentation.api.v1.table_maker_3.metricsTableMaker import TableMaker3
+
+SECTION_SIZE = 40
+
+
+def make_catalog(count: int, seed: int = 1) -> Tuple[List[MetricRow], List[SectionRow]]:
+    rnd = random.Random(seed)
+    sections = [SectionRow(i, f"Раздел {i}") for i in range(1, max(1, count // SECTION_SIZE) + 1)]
+    metrics = []
+    number = 0
+    for section in sections:
+        while len(metrics) < count * section.id // len(sections):
+            number += 1
+            subnumbers = [None] if rnd.random() < 0.3 else "абвг"[:rnd.randint(1, 4)]
+            for subnumber in subnumbers:
+                metric_id = len(metrics) + 1
+                metrics.append(MetricRow(
+                    metric_id, number, subnumber, f"Показатель {metric_id}",
+                    "шт.", "от 20 до 40", "от 40 до 60", "от 60 до 80",
+                    "1 раз в год", "Данные мониторинга", "Примечание",
+                    metric_id % 10, section.id,
+                ))
+    return metrics, sections
+
+
+def measure(count: int, rounds: int) -> float:
+    metrics, sections = make_catalog(count)
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        TableMaker3.make_excel(metrics, sections).close()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    per_metric = []
+    for count in args.sizes:
+        elapsed = measure(count, args.rounds)
+        per_metric.append(elapsed / count)
+        sys.stdout.write(
+            f"metrics={count:<5} {elapsed * 1000:8.1f}ms "
+            f"per metric={elapsed / count * 1000:6.3f}ms\n"
+        )
+    # Для линейного роста отношение близко к 1, для квадратичного
+    # растет вместе с размером каталога
+    sys.stdout.write(
+        f"per-metric time, largest / smallest: {per_metric[-1] / per_metric[0]:.2f}\n"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from sqlalchemy.dialects import postgresql
+
+from api.presentation.api.v1.summary_table import (
+    build_quarter_metrics_query,
+    get_index_bounds,
+)
+from api.presentation.api.v1.working_days_index import absolute_quarter
+
+
+def compile_query(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_quarter_metrics_skip_unnest_padding():
+    # Массивы metrics_id и duration разной длины: unnest дополняет
+    # короткий NULL, такие строки не должны попасть в ответ
+    query, _ = build_quarter_metrics_query(2)
+    sql = compile_query(query)
+    assert "items.metric_id IS NOT NULL" in sql
+    assert "items.duration IS NOT NULL" in sql
+
+
+def test_index_bounds_cover_longest_duration():
+    assert get_index_bounds([2, 5, 1], 2025, 2) == (
+        absolute_quarter(2024, 2), absolute_quarter(2025, 2)
+    )
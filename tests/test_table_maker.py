@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.table_maker import measure
+
+# Время на метрику на 2000 метриках не больше чем в MAX_RATIO раз выше,
+# чем на 100: при квадратичном росте отношение было бы около 20
+MAX_RATIO = 2.5
+
+
+@pytest.mark.slow
+def test_make_excel_scales_linearly():
+    per_metric = {
+        count: measure(count, rounds) / count
+        for count, rounds in ((100, 5), (500, 1), (2000, 1))
+    }
+    assert per_metric[2000] <= per_metric[100] * MAX_RATIO
+    assert per_metric[500] <= per_metric[100] * MAX_RATIO
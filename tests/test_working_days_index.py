@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from api.presentation.api.v1.working_days_index import (
+    WorkingDaysIndex,
+    absolute_quarter,
+    lookback_window,
+)
+
+
+def test_lookback_window_crosses_year_boundary():
+    # 4 квартала до 1 квартала 2025 включительно: 2024/2 .. 2025/1
+    assert lookback_window(4, 2025, 1) == (
+        absolute_quarter(2024, 2), absolute_quarter(2025, 1)
+    )
+
+
+def test_lookback_window_is_at_least_one_quarter():
+    assert lookback_window(0, 2025, 3) == (
+        absolute_quarter(2025, 3), absolute_quarter(2025, 3)
+    )
+
+
+def make_index():
+    # Индекс на 2024/3 .. 2025/2, 2025/1 записан двумя месяцами
+    return WorkingDaysIndex.from_totals(
+        absolute_quarter(2024, 3),
+        absolute_quarter(2025, 2),
+        calendar_totals=[
+            (2024, 3, 66), (2024, 4, 64), (2025, 1, 20), (2025, 1, 36),
+            (2025, 2, 61), (2023, 4, 100),
+        ],
+        employee_totals=[
+            ("a", 2024, 4, 30), ("a", 2025, 1, 10), ("a", 2025, 1, 15),
+            ("b", 2025, 2, 40), ("c", 2026, 1, 5),
+        ],
+    )
+
+
+def test_windows_across_year_boundary():
+    index = make_index()
+    windows = [lookback_window(2, 2025, 1), lookback_window(3, 2025, 2)]
+
+    np.testing.assert_array_equal(
+        index.calendar_days(windows), [64 + 56, 64 + 56 + 61]
+    )
+    np.testing.assert_array_equal(
+        index.employee_days(["a", "b", "missing"], windows),
+        [[55, 55], [0, 40], [0, 0]],
+    )
+
+
+def test_window_is_clipped_to_index():
+    index = make_index()
+    # Кварталы до начала индекса (2023/4) не учитываются
+    np.testing.assert_array_equal(
+        index.calendar_days([lookback_window(8, 2025, 2)]),
+        [66 + 64 + 56 + 61],
+    )
+
+
+def test_rows_outside_index_are_skipped():
+    assert make_index().employee_keys() == ["a", "b"]
+
+
+def test_month_rows_of_a_quarter_are_summed():
+    # Изменение месячной записи попадает в индекс при следующей сборке
+    before = make_index()
+    after = WorkingDaysIndex.from_totals(
+        before.first_quarter,
+        before.last_quarter,
+        calendar_totals=[],
+        employee_totals=[("a", 2025, 1, 10), ("a", 2025, 1, 20)],
+    )
+    window = [lookback_window(1, 2025, 1)]
+    assert before.employee_days(["a"], window)[0, 0] == 25
+    assert after.employee_days(["a"], window)[0, 0] == 30
+
+
+def test_rejects_inverted_range():
+    with pytest.raises(ValueError):
+        WorkingDaysIndex(10, 9)